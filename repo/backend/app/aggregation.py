@@ -0,0 +1,122 @@
+# app/aggregation.py
+# Server-side GROUP BY aggregates over a table, cached briefly per table version
+from typing import Optional
+from sqlalchemy import JSON, Boolean, Numeric, Integer, text
+from sqlalchemy.orm import Session
+
+from . import db_manager, cache, profiling
+from .config import settings
+
+AGGREGATE_FUNCTIONS = ("count", "count_distinct", "sum", "avg", "min", "max")
+# Functions that only make sense on numeric columns
+NUMERIC_FUNCTIONS = {"sum", "avg"}
+# Hard cap on the number of groups a single request may return
+MAX_GROUPS = 1000
+
+# Keyed by table version; the TTL bounds staleness after writes no version bump saw
+# (other tools writing to the database, or an invalidation message that was missed)
+_results = cache.ResultCache(max_entries=512, ttl_seconds=settings.TABLE_READ_CACHE_TTL_SECONDS)
+
+
+def parse_aggregates(spec: Optional[str]) -> list[tuple[str, str]]:
+    """Parses 'count:*,sum:stock_quantity' into [('count', '*'), ('sum', 'stock_quantity')]."""
+    if not spec:
+        return [("count", "*")]
+    aggregates = []
+    for item in spec.split(","):
+        function, _, column = item.strip().partition(":")
+        aggregates.append((function.lower(), column or "*"))
+    return aggregates
+
+
+def _validate(table, group_by: list[str], aggregates: list[tuple[str, str]]):
+    columns = {c.name: c for c in table.columns}
+    unknown = [c for c in group_by if c not in columns]
+    if unknown:
+        raise ValueError(f"Unknown group-by columns for table '{table.name}': {', '.join(unknown)}")
+    for column in group_by:
+        if isinstance(columns[column].type, JSON):
+            raise ValueError(f"Cannot group by JSON column '{column}'")
+
+    for function, column in aggregates:
+        if function not in AGGREGATE_FUNCTIONS:
+            raise ValueError(f"Aggregate function must be one of: {', '.join(AGGREGATE_FUNCTIONS)}")
+        if column == "*":
+            if function != "count":
+                raise ValueError(f"'{function}' needs a column")
+            continue
+        if column not in columns:
+            raise ValueError(f"Unknown column for table '{table.name}': {column}")
+        column_type = columns[column].type
+        if function in NUMERIC_FUNCTIONS and not isinstance(column_type, (Integer, Numeric)):
+            raise ValueError(f"'{function}' needs a numeric column, '{column}' is not")
+        if function in ("min", "max") and isinstance(column_type, (JSON, Boolean)):
+            raise ValueError(f"'{function}' is not supported on column '{column}'")
+        # json has no equality operator, so DISTINCT cannot compare its values
+        if function == "count_distinct" and isinstance(column_type, JSON):
+            raise ValueError(f"'{function}' is not supported on column '{column}'")
+
+
+def _select_expression(function: str, column: str) -> tuple[str, str]:
+    """Returns (SQL expression, result key) for one aggregate."""
+    if column == "*":
+        return "count(*)", "count"
+    if function == "count_distinct":
+        return f'count(DISTINCT "{column}")', f"count_distinct_{column}"
+    return f'{function}("{column}")', f"{function}_{column}"
+
+
+@profiling.capture_plans
+def aggregate_table(
+    db: Session,
+    table_name: str,
+    group_by: Optional[list[str]] = None,
+    aggregates: Optional[list[tuple[str, str]]] = None,
+    filters_json: Optional[str] = None,
+    limit: int = MAX_GROUPS
+) -> dict:
+    """Runs one GROUP BY query over the table, honouring the same filter JSON as table reads."""
+    engine = db.get_engine()
+    env = db.get_env()
+    table = db_manager._reflect_table(engine, env, table_name)
+    group_by = list(dict.fromkeys(group_by or []))
+    aggregates = list(dict.fromkeys(aggregates or [("count", "*")]))
+    _validate(table, group_by, aggregates)
+    limit = max(1, min(limit, MAX_GROUPS))
+
+    # Read the version before querying: a concurrent write then only orphans this entry
+    version = cache.get_table_version(env, table_name)
+    key = (env, table_name, version, tuple(group_by), tuple(aggregates), filters_json or "", limit)
+    cached = _results.get(key)
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    expressions = [_select_expression(function, column) for function, column in aggregates]
+    select_list = [f'"{c}"' for c in group_by] + [f'{sql} AS "{alias}"' for sql, alias in expressions]
+    where_clauses, params, applied_filters = db_manager._build_filter_clauses(table, filters_json)
+
+    query = f"SELECT {', '.join(select_list)} FROM {env}.\"{table_name}\""
+    if where_clauses:
+        query += " WHERE " + " AND ".join(where_clauses)
+    if group_by:
+        grouping = ", ".join(f'"{c}"' for c in group_by)
+        # One extra row tells us whether the result was cut off
+        query += f" GROUP BY {grouping} ORDER BY {grouping} LIMIT :limit"
+        params["limit"] = limit + 1
+
+    with engine.connect() as connection:
+        rows = [dict(row) for row in connection.execute(text(query), params).mappings()]
+
+    truncated = len(rows) > limit
+    result = {
+        "table": table_name,
+        "group_by": group_by,
+        "aggregates": [alias for _, alias in expressions],
+        "filters": [{"column": c, "operator": op} for c, op in applied_filters],
+        "groups": [db_manager._make_record_serializable(row) for row in rows[:limit]],
+        "truncated": truncated,
+        "table_version": version,
+    }
+    if cache.cacheable(db, table_name):
+        _results.set(key, result)
+    return {**result, "cached": False}
@@ -1,17 +1,21 @@
 # app/api.py
 # API router for all endpoints related to authentication, data changes, and table management
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import inspect
 from fastapi.security import OAuth2PasswordRequestForm
 from . import auth, models
-from datetime import timedelta
+from datetime import datetime, timedelta
 from typing import Optional
+import json
+import logging
 
 # Import the new schema and the get_db dependency
-from . import db_manager, schemas
+from . import db_manager, schemas, compare, promotion, profiling, seeding, search, index_advisor, aggregation, saved_queries, introspection, metrics, fanout
+from .config import settings
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Dependency functions for user authentication and role validation
 get_current_user = auth.create_get_current_user(db_manager.get_db)
@@ -23,24 +27,18 @@ get_current_admin_user = lambda current_user: auth.get_current_admin_user(curren
 @router.post("/{env}/token")
 def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(db_manager.get_db)):
     # Handle user login and return an access token if credentials are valid
-    print(f"Login attempt - Username: {form_data.username}")
     user = db.query(models.User).filter(models.User.username == form_data.username).first()
-    print(f"User found: {user is not None}")
-    
-    if user:
-        print(f"User role: {user.role}, is_active: {user.is_active}")
-        password_valid = auth.verify_password(form_data.password, user.password_hash)
-        print(f"Password verification: {password_valid}")
-    
+
+    # bcrypt is deliberately slow, so the password is verified exactly once
     if not user or not auth.verify_password(form_data.password, user.password_hash):
-        print("Login failed - Invalid credentials")
+        logger.warning("login failed", extra={"fields": {"username": form_data.username, "user_found": user is not None}})
         raise HTTPException(
             status_code=401,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    print("Login successful - Generating token")
+
+    logger.info("login succeeded", extra={"fields": {"username": user.username, "role": user.role}})
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth.create_access_token(
         data={"sub": user.username, "role": user.role}, expires_delta=access_token_expires
@@ -68,14 +66,131 @@ def submit_change_for_approval(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to submit change: {str(e)}")
 
+@router.post("/{env}/promotions", status_code=201)
+def submit_promotion_for_approval(
+    promotion_request: schemas.PromotionRequest,
+    db: Session = Depends(db_manager.get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Computes the delta between a table in the source environment and this one and
+    submits it for approval as a single pending change.
+    """
+    try:
+        active_user = get_current_active_user(current_user)
+        return promotion.create_promotion_request(
+            db=db,
+            promotion=promotion_request,
+            user=active_user
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to submit promotion: {str(e)}")
+
+# Cross-environment routes. Registered before the /{env}/... routes, which would otherwise
+# take "compare" or "all" for an environment name (e.g. /compare/tables as /{env}/tables).
+
+@router.get("/compare/{table_name}")
+def compare_table_across_environments(
+    table_name: str,
+    left: str,
+    right: str,
+    max_rows: int = 1000
+):
+    """Compare a table between two environments using chunked range hashing (at most compare.MAX_ROWS rows per list)"""
+    try:
+        return compare.compare_tables(left_env=left, right_env=right, table_name=table_name, max_rows=max_rows)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/all/tables/{table_name}")
+def get_data_from_all_environments(
+    request: Request,
+    table_name: str,
+    limit: int = 20,
+    offset: int = 0,
+    filters: Optional[str] = None,
+    columns: Optional[str] = None,
+    timeout: float = settings.FANOUT_TIMEOUT_SECONDS
+):
+    """Read the same page of a table from every environment concurrently, keyed by environment"""
+    def read(db: Session) -> dict:
+        data = db_manager.get_table_data(
+            db=db,
+            table_name=table_name,
+            limit=limit,
+            offset=offset,
+            filters_json=filters,
+            columns=columns.split(",") if columns else None
+        )
+        return {"data": data}
+
+    try:
+        return fanout.fan_out(request, table_name, read, timeout)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/all/tables/{table_name}/count")
+def count_rows_in_all_environments(
+    request: Request,
+    table_name: str,
+    filters: Optional[str] = None,
+    timeout: float = settings.FANOUT_TIMEOUT_SECONDS
+):
+    """Count the rows matching `filters` in every environment concurrently"""
+    def read(db: Session) -> dict:
+        result = aggregation.aggregate_table(db=db, table_name=table_name, filters_json=filters)
+        return {"count": result["groups"][0]["count"], "cached": result["cached"]}
+
+    try:
+        return fanout.fan_out(request, table_name, read, timeout)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/all/tables/{table_name}/aggregate")
+def aggregate_table_in_all_environments(
+    request: Request,
+    table_name: str,
+    group_by: Optional[str] = None,
+    aggregates: Optional[str] = None,
+    filters: Optional[str] = None,
+    limit: int = aggregation.MAX_GROUPS,
+    timeout: float = settings.FANOUT_TIMEOUT_SECONDS
+):
+    """Run the same GROUP BY aggregate in every environment concurrently"""
+    def read(db: Session) -> dict:
+        result = aggregation.aggregate_table(
+            db=db,
+            table_name=table_name,
+            group_by=group_by.split(",") if group_by else None,
+            aggregates=aggregation.parse_aggregates(aggregates),
+            filters_json=filters,
+            limit=limit
+        )
+        return {key: value for key, value in result.items() if key != "table"}
+
+    try:
+        return fanout.fan_out(request, table_name, read, timeout)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{env}/tables/{table_name}/schema")
-def get_table_schema(table_name: str, db: Session = Depends(db_manager.get_db)):
+def get_table_schema(table_name: str, db: Session = Depends(db_manager.get_read_db)):
     """
     Get the schema information for a specific table
     """
     try:
         schema = db_manager.get_table_schema(db=db, table_name=table_name)
         return {"table": table_name, "schema": schema}
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -94,6 +209,46 @@ def get_pending_changes(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/{env}/changes/stacks")
+def get_change_stacks(
+    db: Session = Depends(db_manager.get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Get pending changes that edit the same record, with their merged net effect
+    """
+    try:
+        get_current_admin_user(current_user)
+        return {"stacks": db_manager.get_change_stacks(db=db)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{env}/changes/stacks/approve")
+def approve_change_stack(
+    stack_approval: schemas.ChangeStackApproval,
+    db: Session = Depends(db_manager.get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Approve several pending changes to one record with a single combined apply
+    """
+    admin_user = get_current_admin_user(current_user)
+    try:
+        changes = db_manager.approve_change_stack(
+            db=db, change_ids=stack_approval.change_ids, admin_user_id=admin_user.id
+        )
+        return {"message": "Change stack approved successfully", "change_ids": [c.id for c in changes]}
+    except db_manager.ChangeConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/{env}/changes/{change_id}/approve")
 def approve_change(
     change_id: int, 
@@ -107,6 +262,8 @@ def approve_change(
         admin_user = get_current_admin_user(current_user)
         result = db_manager.approve_change(db=db, change_id=change_id, admin_user_id=admin_user.id)
         return {"message": "Change approved successfully", "change_id": change_id}
+    except db_manager.ChangeConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -141,6 +298,35 @@ def delete_record_from_table(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/{env}/tables/{table_name}/bulk-delete")
+def bulk_delete_from_table(
+    table_name: str,
+    bulk_delete: schemas.BulkDeleteRequest,
+    db: Session = Depends(db_manager.get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Delete many records by id list or filters, in chunks, with audit entries and one snapshot
+    """
+    admin_user = get_current_admin_user(current_user)
+    try:
+        if table_name not in db_manager.get_all_table_names(db=db):
+            raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found.")
+        return db_manager.bulk_delete_records(
+            db=db,
+            table_name=table_name,
+            user=admin_user,
+            ids=bulk_delete.ids,
+            filters_json=json.dumps(bulk_delete.filters) if bulk_delete.filters is not None else None,
+            chunk_size=bulk_delete.chunk_size
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 
 @router.post("/{env}/seed")
 def seed_db(env: str):
@@ -151,8 +337,35 @@ def seed_db(env: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/{env}/seed/bulk", status_code=202)
+def bulk_seed_db(
+    env: str,
+    spec: dict,
+    current_user: models.User = Depends(get_current_user)
+):
+    """Start seeding an environment from a declarative spec in a background job; poll it with GET /{env}/seed/bulk/{job_id}"""
+    get_current_admin_user(current_user)
+    try:
+        return seeding.start_seed_job(spec, envs=[env])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{env}/seed/bulk/{job_id}")
+def get_bulk_seed_job(
+    job_id: str,
+    current_user: models.User = Depends(get_current_user)
+):
+    """Status of a bulk seed job, with its result once finished"""
+    get_current_admin_user(current_user)
+    try:
+        return seeding.get_seed_job(job_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 @router.get("/{env}/tables")
-def list_tables(db: Session = Depends(db_manager.get_db)):
+def list_tables(db: Session = Depends(db_manager.get_read_db)):
     # List all table names in the current environment
     try:
         tables = db_manager.get_all_table_names(db=db)
@@ -160,34 +373,153 @@ def list_tables(db: Session = Depends(db_manager.get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/{env}/schema")
+def get_schema_catalog(
+    request: Request,
+    response: Response,
+    db: Session = Depends(db_manager.get_read_db)
+):
+    """
+    Get every table with its columns, primary key, indexes, foreign keys and estimated
+    row count in one call. The ETag changes only when the schema's DDL does.
+    """
+    try:
+        catalog = introspection.get_schema_catalog(db=db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    etag = f'"{catalog["fingerprint"]}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return catalog
+
 @router.get("/{env}/tables/{table_name}")
 def get_data_from_table(
     table_name: str, 
+    response: Response,
     limit: int = 20, 
     offset: int = 0,
     filters: Optional[str] = None,
-    db: Session = Depends(db_manager.get_db)
+    columns: Optional[str] = None,
+    truncate: Optional[int] = None,
+    as_of: Optional[datetime] = None,
+    db: Session = Depends(db_manager.get_read_db)
 ):
-    # Fetch data from a specific table, with optional pagination and filtering
+    # Fetch data from a specific table, with optional pagination, filtering,
+    # column projection (comma-separated), truncation of large text/JSON cells,
+    # and `as_of` to read the table as it was at a past time.
+    # Identical concurrent reads share one query and one encoded body (X-Cache tells how it was served)
     try:
         if table_name not in db_manager.get_all_table_names(db=db):
             raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found.")
-            
-        data = db_manager.get_table_data(
+        if truncate is not None and truncate < 1:
+            raise HTTPException(status_code=400, detail="truncate must be a positive number of characters")
+
+        body, outcome = db_manager.get_table_page(
             db=db,
             table_name=table_name, 
             limit=limit, 
             offset=offset,
-            filters_json=filters
+            filters_json=filters,
+            columns=columns.split(",") if columns else None,
+            truncate_at=truncate,
+            as_of=as_of
+        )
+        metrics.TABLE_READ_CACHE.inc(db.get_env(), outcome)
+        headers = {**response.headers, "X-Cache": outcome}
+        return Response(content=body, media_type="application/json", headers=headers)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{env}/tables/{table_name}/{record_id}/{column_name}")
+def get_cell_from_table(
+    table_name: str,
+    record_id: int,
+    column_name: str,
+    db: Session = Depends(db_manager.get_read_db)
+):
+    """Get the full value of a single cell (e.g. one truncated in a page read)"""
+    try:
+        if table_name not in db_manager.get_all_table_names(db=db):
+            raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found.")
+        value = db_manager.get_cell_value(db=db, table_name=table_name, record_id=record_id, column=column_name)
+        return {"table": table_name, "record_id": record_id, "column": column_name, "value": value}
+    except HTTPException:
+        raise
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{env}/tables/{table_name}/search")
+def search_table(
+    table_name: str,
+    q: str,
+    limit: int = 20,
+    offset: int = 0,
+    columns: Optional[str] = None,
+    db: Session = Depends(db_manager.get_read_db)
+):
+    # Ranked substring search across the table's text columns (optionally a comma-separated subset)
+    try:
+        if table_name not in db_manager.get_all_table_names(db=db):
+            raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found.")
+
+        return search.search_table(
+            db=db,
+            table_name=table_name,
+            q=q,
+            limit=limit,
+            offset=offset,
+            columns=columns.split(",") if columns else None
         )
-        return {"table": table_name, "data": data}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{env}/tables/{table_name}/aggregate")
+def aggregate_table(
+    table_name: str,
+    group_by: Optional[str] = None,
+    aggregates: Optional[str] = None,
+    filters: Optional[str] = None,
+    limit: int = aggregation.MAX_GROUPS,
+    db: Session = Depends(db_manager.get_read_db)
+):
+    # GROUP BY the comma-separated `group_by` columns and compute `aggregates`
+    # given as comma-separated function:column pairs, e.g. count:*,sum:stock_quantity
+    try:
+        if table_name not in db_manager.get_all_table_names(db=db):
+            raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found.")
+
+        return aggregation.aggregate_table(
+            db=db,
+            table_name=table_name,
+            group_by=group_by.split(",") if group_by else None,
+            aggregates=aggregation.parse_aggregates(aggregates),
+            filters_json=filters,
+            limit=limit
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{env}/tables/{table_name}/snapshots")
 def get_table_snapshots(
     table_name: str,
-    db: Session = Depends(db_manager.get_db)
+    db: Session = Depends(db_manager.get_read_db)
 ):
     """Get all snapshots for a specific table"""
     try:
@@ -199,7 +531,7 @@ def get_table_snapshots(
 @router.get("/{env}/snapshots/{snapshot_id}")
 def get_snapshot(
     snapshot_id: int,
-    db: Session = Depends(db_manager.get_db)
+    db: Session = Depends(db_manager.get_read_db)
 ):
     # Retrieve the full data for a specific snapshot
     try:
@@ -209,3 +541,136 @@ def get_snapshot(
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{env}/debug/profiles")
+def list_request_profiles(current_user: models.User = Depends(get_current_user)):
+    """List recently profiled requests (newest first)"""
+    get_current_admin_user(current_user)
+    return {"profiles": profiling.list_profiles()}
+
+@router.get("/{env}/debug/profiles/{profile_id}")
+def get_request_profile(profile_id: str, current_user: models.User = Depends(get_current_user)):
+    """Get every SQL statement and timing recorded for a profiled request"""
+    get_current_admin_user(current_user)
+    try:
+        return profiling.get_profile(profile_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/{env}/debug/slow-queries")
+def list_slow_queries(current_user: models.User = Depends(get_current_user)):
+    """List captured slow statements with their EXPLAIN (ANALYZE, BUFFERS) plans"""
+    get_current_admin_user(current_user)
+    return {"slow_queries": profiling.list_slow_queries()}
+
+@router.get("/{env}/admin/index-advice")
+def get_index_advice(
+    db: Session = Depends(db_manager.get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Recommend indexes from recorded filter usage and table/column statistics"""
+    get_current_admin_user(current_user)
+    try:
+        return index_advisor.recommend_indexes(db=db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{env}/admin/search-indexes")
+def build_search_indexes(
+    db: Session = Depends(db_manager.get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """(Re)build the trigram indexes for the columns in SEARCH_INDEX_COLUMNS"""
+    get_current_admin_user(current_user)
+    try:
+        return search.build_search_indexes(db.get_engine(), db.get_env())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{env}/admin/indexes")
+def create_recommended_index(
+    index_request: schemas.IndexCreateRequest,
+    db: Session = Depends(db_manager.get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Create an index with CREATE INDEX CONCURRENTLY. Without confirm=true only the
+    statement that would be run is returned.
+    """
+    get_current_admin_user(current_user)
+    if not index_request.confirm:
+        return {
+            "created": False,
+            "ddl": index_advisor.index_ddl(db.get_env(), index_request.table_name, index_request.column, index_request.method),
+            "message": "Re-send with confirm=true to create this index."
+        }
+    try:
+        ddl = index_advisor.create_index(
+            db=db,
+            table_name=index_request.table_name,
+            column=index_request.column,
+            method=index_request.method
+        )
+        return {"created": True, "ddl": ddl}
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{env}/queries")
+def list_saved_queries(db: Session = Depends(db_manager.get_read_db)):
+    """List the saved (predefined) queries"""
+    try:
+        return {"queries": saved_queries.list_saved_queries(db=db)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{env}/queries", status_code=201)
+def create_saved_query(
+    query: schemas.SavedQueryCreate,
+    db: Session = Depends(db_manager.get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Save a parameterised query; filter values written as ":name" become parameters"""
+    admin_user = get_current_admin_user(current_user)
+    try:
+        return saved_queries.create_saved_query(db=db, query=query, user=admin_user)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{env}/queries/{query_id}/run")
+def run_saved_query(
+    query_id: int,
+    run: schemas.SavedQueryRun,
+    db: Session = Depends(db_manager.get_read_db)
+):
+    """Run a saved query with the given parameter values"""
+    try:
+        return saved_queries.run_saved_query(db=db, query_id=query_id, parameters=run.parameters)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/{env}/queries/{query_id}", status_code=204)
+def delete_saved_query(
+    query_id: int,
+    db: Session = Depends(db_manager.get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Delete a saved query"""
+    get_current_admin_user(current_user)
+    try:
+        saved_queries.delete_saved_query(db=db, query_id=query_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,92 @@
+# app/bootstrap.py
+# Startup DDL and seeding, run by one worker at a time under a Postgres advisory lock
+import logging
+import time
+import zlib
+from sqlalchemy import MetaData, text
+
+from . import db_manager, search
+from .database import Base
+from . import models  # Registers all models with Base.metadata
+
+logger = logging.getLogger(__name__)
+
+# Advisory lock key space for bootstrap; the second key is derived from the environment name
+BOOTSTRAP_LOCK_CLASS = 0x5A601E
+
+
+def _lock_key(env: str) -> int:
+    return zlib.crc32(env.encode()) & 0x7FFFFFFF
+
+
+def setup_environment(env: str):
+    """Ensure the schema and all tables exist for one environment (multi-tenant setup)."""
+    engine = db_manager.get_engine(env)
+
+    # Create the schema if it doesn't already exist.
+    with engine.connect() as connection:
+        connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {env}"))
+        connection.commit()
+
+    # Create all tables for the current environment's schema.
+    # Create a new metadata object to avoid conflicts between environments
+    env_metadata = MetaData(schema=env)
+
+    # Copy all tables from the base metadata to the environment-specific metadata
+    for table in Base.metadata.tables.values():
+        table.to_metadata(env_metadata)
+
+    # Create all tables with the environment-specific metadata
+    env_metadata.create_all(bind=engine)
+    logger.info("schema and tables ready", extra={"fields": {"env": env}})
+
+    # Indexes and enum values added to models after their tables were first created
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TYPE changestatus ADD VALUE IF NOT EXISTS 'FAILED'"))
+        connection.execute(text("ALTER TYPE changestatus ADD VALUE IF NOT EXISTS 'RUNNING'"))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_audit_log_table_name_approved_at ON {env}.audit_log (table_name, approved_at)"
+        ))
+
+
+def bootstrap_environment(env: str, seed: bool = True):
+    """
+    Runs setup (and seeding) for one environment while holding a session-level advisory
+    lock, so when several workers start at once exactly one does the work at a time; the
+    others wait for it and then find everything already in place.
+    """
+    engine = db_manager.get_engine(env)
+    with engine.connect() as lock_connection:
+        lock_connection.execute(
+            text("SELECT pg_advisory_lock(:class_key, :object_key)"),
+            {"class_key": BOOTSTRAP_LOCK_CLASS, "object_key": _lock_key(env)}
+        )
+        try:
+            setup_environment(env)
+            db_manager.fail_interrupted_bulk_deletes(engine, env)
+            try:
+                search.build_search_indexes(engine, env)
+            except Exception:
+                # Search still works unindexed; an admin can rebuild the indexes later
+                logger.warning("search index build failed", exc_info=True, extra={"fields": {"env": env}})
+            if seed:
+                db_manager.seed_database(schema=env)
+        finally:
+            lock_connection.execute(
+                text("SELECT pg_advisory_unlock(:class_key, :object_key)"),
+                {"class_key": BOOTSTRAP_LOCK_CLASS, "object_key": _lock_key(env)}
+            )
+            lock_connection.commit()
+
+
+def bootstrap_all(seed: bool = True):
+    for env in db_manager.DATABASE_URLS:
+        started = time.perf_counter()
+        try:
+            bootstrap_environment(env, seed=seed)
+        except Exception:
+            logger.error("environment setup failed", exc_info=True, extra={"fields": {"env": env}})
+            continue
+        logger.info("environment setup finished", extra={"fields": {
+            "env": env, "duration_ms": round((time.perf_counter() - started) * 1000, 2)
+        }})
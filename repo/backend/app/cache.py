@@ -0,0 +1,178 @@
+# app/cache.py
+# Per-table version counters and small in-process result caches keyed by them
+#
+# Every write path (change approval, deletes, promotions, seeding) bumps the version of
+# the table it touched. Cached results include the table version in their key, so a
+# write makes older entries unreachable and they simply age out of the LRU. Bumps are
+# broadcast to the other worker processes over the invalidation channel.
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from . import invalidation
+from .config import settings
+
+# (env, table_name) -> monotonically increasing version
+_table_versions: dict = {}
+# (env, table_name) -> monotonic time of the last bump
+_changed_at: dict = {}
+_versions_lock = threading.Lock()
+
+
+def get_table_version(env: str, table_name: str) -> int:
+    with _versions_lock:
+        return _table_versions.get((env, table_name), 0)
+
+
+def bump_table_version(env: str, table_name: str, broadcast: bool = True) -> int:
+    """Marks a table as changed; results cached against the previous version stop being served."""
+    with _versions_lock:
+        version = _table_versions.get((env, table_name), 0) + 1
+        _table_versions[(env, table_name)] = version
+        _changed_at[(env, table_name)] = time.monotonic()
+    if broadcast:
+        invalidation.publish(env, "table_version", table=table_name)
+    return version
+
+
+def bump_table_versions(env: str, table_names, broadcast: bool = True):
+    """bump_table_version for every table a write touched (each name once)."""
+    for table_name in dict.fromkeys(table_names):
+        bump_table_version(env, table_name, broadcast)
+
+
+def changed_within(env: str, table_name: str, seconds: float) -> bool:
+    """True if the table was written in the last `seconds` (a replica may not have it yet)."""
+    with _versions_lock:
+        changed_at = _changed_at.get((env, table_name))
+    return changed_at is not None and time.monotonic() - changed_at < seconds
+
+
+def cacheable(db, table_name: str) -> bool:
+    """Results read from a replica are only cached once the replica can have caught up with the last write."""
+    if not getattr(db, "is_replica", False):
+        return True
+    return not changed_within(db.get_env(), table_name, settings.REPLICA_MAX_LAG_SECONDS)
+
+
+_result_caches: list = []
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of computed results. With `ttl_seconds`, entries also expire
+    after that long; with `max_bytes`, bytes/str values are weighed by their length and
+    the least recently used are evicted to keep the total under the bound. Keys are
+    tuples that start with the environment, so one environment can be cleared on its own.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: Optional[float] = None, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        # key -> (value, expires_at or None, size)
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        _result_caches.append(self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, self._MISSING)
+            if entry is not self._MISSING and entry[1] is not None and entry[1] <= time.monotonic():
+                self._remove(key)
+                entry = self._MISSING
+            if entry is self._MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any):
+        size = len(value) if isinstance(value, (bytes, str)) else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Hashable):
+        self._bytes -= self._entries.pop(key)[2]
+
+    def clear(self, env: Optional[str] = None):
+        """Drops every entry, or with `env` only that environment's entries."""
+        with self._lock:
+            if env is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            for key in [k for k in self._entries if isinstance(k, tuple) and k and k[0] == env]:
+                self._remove(key)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent identical work: while a call for a key is running, other
+    callers with the same key wait for it and get its result (or its exception) instead
+    of running their own.
+    """
+
+    def __init__(self):
+        self._flights: dict = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """Returns (result, shared); `shared` is True if another caller's run was joined."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+
+def clear_all(env: Optional[str] = None):
+    """Drops every cached result (only `env`'s, if given), e.g. after invalidation messages may have been missed."""
+    for result_cache in _result_caches:
+        result_cache.clear(env)
+
+
+invalidation.register_handler(
+    "table_version", lambda env, message: bump_table_version(env, message["table"], broadcast=False)
+)
+invalidation.register_reset_handler(clear_all)
@@ -0,0 +1,226 @@
+# app/compare.py
+# Cross-environment table comparison using chunked (Merkle-style) range hashing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from sqlalchemy import inspect, text
+
+from . import db_manager
+
+# How many sub-ranges each differing range is split into per level
+FANOUT = 16
+# Ranges at or below this many key values are compared row by row (by row hash)
+LEAF_SIZE = 1000
+# Upper bound for `max_rows`: differing rows fetched and returned per list
+MAX_ROWS = 10000
+
+
+def _run_both(left_fn, right_fn):
+    """Runs the same step against both environments concurrently, each through its own pool."""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        left_future = executor.submit(left_fn)
+        right_future = executor.submit(right_fn)
+        return left_future.result(), right_future.result()
+
+
+class TableSide:
+    """One side (environment) of a comparison: engine plus the SQL fragments for the table."""
+
+    def __init__(self, env: str, table_name: str, pk: str, columns: list[str]):
+        self.env = env
+        self.engine = db_manager.get_engine(env)
+        self.table_name = table_name
+        self.pk = pk
+        self.columns = columns
+        self.qualified_name = f'{env}."{table_name}"'
+        # Hash only the columns both sides share so an extra column does not mark every row as changed
+        row_expr = "ROW(" + ", ".join(f't."{c}"' for c in columns) + ")::text"
+        self.row_hash = f"md5({row_expr})"
+        # Order-independent 64-bit digest of a set of rows; summed as numeric so it cannot overflow
+        self.digest = f"sum(('x' || left({self.row_hash}, 16))::bit(64)::bigint::numeric)"
+
+    def key_bounds(self) -> tuple[Optional[int], Optional[int]]:
+        with self.engine.connect() as connection:
+            row = connection.execute(
+                text(f'SELECT min(t."{self.pk}"), max(t."{self.pk}") FROM {self.qualified_name} t')
+            ).fetchone()
+            return row[0], row[1]
+
+    def range_digests(self, ranges: list[tuple[int, int, int]]) -> dict:
+        """
+        Hashes every sub-bucket of the given (lo, hi, width) ranges in a single statement.
+        Returns {(range_index, bucket): (row_count, digest)}.
+        """
+        query = f"""
+            SELECT r.idx, (t."{self.pk}"::bigint - r.lo) / r.width AS bucket,
+                   count(*) AS row_count, {self.digest} AS digest
+            FROM unnest(CAST(:los AS bigint[]), CAST(:his AS bigint[]), CAST(:widths AS bigint[]))
+                 WITH ORDINALITY AS r(lo, hi, width, idx)
+            JOIN {self.qualified_name} t ON t."{self.pk}" >= r.lo AND t."{self.pk}" < r.hi
+            GROUP BY 1, 2
+        """
+        params = {
+            "los": [r[0] for r in ranges],
+            "his": [r[1] for r in ranges],
+            "widths": [r[2] for r in ranges],
+        }
+        with self.engine.connect() as connection:
+            result = connection.execute(text(query), params)
+            return {(row.idx - 1, row.bucket): (row.row_count, row.digest) for row in result}
+
+    def leaf_hashes(self, ranges: list[tuple[int, int]]) -> dict:
+        """Returns {pk: row_hash} for every row inside the given (lo, hi) ranges."""
+        query = f"""
+            SELECT t."{self.pk}" AS pk, {self.row_hash} AS row_hash
+            FROM unnest(CAST(:los AS bigint[]), CAST(:his AS bigint[])) AS r(lo, hi)
+            JOIN {self.qualified_name} t ON t."{self.pk}" >= r.lo AND t."{self.pk}" < r.hi
+        """
+        params = {"los": [r[0] for r in ranges], "his": [r[1] for r in ranges]}
+        with self.engine.connect() as connection:
+            return {row.pk: row.row_hash for row in connection.execute(text(query), params)}
+
+    def fetch_rows(self, keys: list[int]) -> dict:
+        """Fetches full rows for the given primary keys, keyed by primary key."""
+        if not keys:
+            return {}
+        query = f'SELECT * FROM {self.qualified_name} t WHERE t."{self.pk}" = ANY(CAST(:keys AS bigint[]))'
+        with self.engine.connect() as connection:
+            result = connection.execute(text(query), {"keys": list(keys)})
+            return {row[self.pk]: dict(row) for row in result.mappings()}
+
+
+def _single_integer_pk(engine, env: str, table_name: str) -> str:
+    table = db_manager._reflect_table(engine, env, table_name)
+    pk_columns = list(table.primary_key.columns)
+    if len(pk_columns) != 1:
+        raise ValueError(f"Table '{table_name}' must have a single-column primary key to be compared")
+    try:
+        if pk_columns[0].type.python_type is not int:
+            raise ValueError(f"Table '{table_name}' must have an integer primary key to be compared")
+    except NotImplementedError:
+        raise ValueError(f"Table '{table_name}' must have an integer primary key to be compared")
+    return pk_columns[0].name
+
+
+def _prepare_sides(left_env: str, right_env: str, table_name: str) -> tuple[TableSide, TableSide]:
+    for env in (left_env, right_env):
+        if env not in db_manager.DATABASE_URLS or not db_manager.DATABASE_URLS[env]:
+            raise LookupError(f"Environment '{env}' not found or not configured.")
+        engine = db_manager.get_engine(env)
+        if table_name not in inspect(engine).get_table_names(schema=env):
+            raise LookupError(f"Table '{table_name}' not found in environment '{env}'.")
+
+    left_engine = db_manager.get_engine(left_env)
+    right_engine = db_manager.get_engine(right_env)
+    pk = _single_integer_pk(left_engine, left_env, table_name)
+    if _single_integer_pk(right_engine, right_env, table_name) != pk:
+        raise ValueError(f"Table '{table_name}' has different primary keys in '{left_env}' and '{right_env}'")
+
+    left_columns = [c.name for c in db_manager._reflect_table(left_engine, left_env, table_name).columns]
+    right_columns = {c.name for c in db_manager._reflect_table(right_engine, right_env, table_name).columns}
+    common_columns = [c for c in left_columns if c in right_columns]
+
+    return (
+        TableSide(left_env, table_name, pk, common_columns),
+        TableSide(right_env, table_name, pk, common_columns),
+    )
+
+
+def diff_keys(left: TableSide, right: TableSide, leaf_size: int = LEAF_SIZE, fanout: int = FANOUT) -> dict:
+    """
+    Finds the primary keys that differ between two sides of a comparison.
+
+    Key ranges are hashed inside Postgres on both sides at once; only ranges whose
+    digests differ are split further, and only the leaves that still differ are
+    compared row by row (by row hash, not by row contents).
+    """
+    stats = {"levels": 0, "ranges_hashed": 0, "leaf_rows_compared": 0}
+    (left_min, left_max), (right_min, right_max) = _run_both(left.key_bounds, right.key_bounds)
+    mins = [v for v in (left_min, right_min) if v is not None]
+    maxes = [v for v in (left_max, right_max) if v is not None]
+    if not mins:
+        return {"only_in_left": [], "only_in_right": [], "changed": [], "stats": stats}
+
+    pending = [(min(mins), max(maxes) + 1)]
+    leaves = []
+    while pending:
+        splittable = [(lo, hi) for lo, hi in pending if hi - lo > leaf_size]
+        leaves.extend((lo, hi) for lo, hi in pending if hi - lo <= leaf_size)
+        if not splittable:
+            break
+
+        ranges = [(lo, hi, -(-(hi - lo) // fanout)) for lo, hi in splittable]
+        left_digests, right_digests = _run_both(
+            lambda: left.range_digests(ranges), lambda: right.range_digests(ranges)
+        )
+        stats["levels"] += 1
+        stats["ranges_hashed"] += len(ranges)
+
+        pending = []
+        for bucket_key in set(left_digests) | set(right_digests):
+            if left_digests.get(bucket_key) == right_digests.get(bucket_key):
+                continue
+            range_index, bucket = bucket_key
+            lo, hi, width = ranges[range_index]
+            bucket_lo = lo + bucket * width
+            pending.append((bucket_lo, min(bucket_lo + width, hi)))
+
+    only_in_left, only_in_right, changed = [], [], []
+    if leaves:
+        left_hashes, right_hashes = _run_both(lambda: left.leaf_hashes(leaves), lambda: right.leaf_hashes(leaves))
+        stats["leaf_rows_compared"] = len(left_hashes) + len(right_hashes)
+        for key, row_hash in left_hashes.items():
+            if key not in right_hashes:
+                only_in_left.append(key)
+            elif right_hashes[key] != row_hash:
+                changed.append(key)
+        only_in_right = [key for key in right_hashes if key not in left_hashes]
+
+    return {
+        "only_in_left": sorted(only_in_left),
+        "only_in_right": sorted(only_in_right),
+        "changed": sorted(changed),
+        "stats": stats,
+    }
+
+
+def compare_tables(left_env: str, right_env: str, table_name: str, max_rows: int = 1000) -> dict:
+    """Compares a table across two environments and returns the differing rows."""
+    max_rows = max(0, min(max_rows, MAX_ROWS))
+    left, right = _prepare_sides(left_env, right_env, table_name)
+    keys = diff_keys(left, right)
+
+    only_in_left = keys["only_in_left"][:max_rows]
+    only_in_right = keys["only_in_right"][:max_rows]
+    changed = keys["changed"][:max_rows]
+    left_rows, right_rows = _run_both(
+        lambda: left.fetch_rows(only_in_left + changed), lambda: right.fetch_rows(only_in_right + changed)
+    )
+
+    changed_rows = []
+    for key in changed:
+        left_row = db_manager._make_record_serializable(left_rows.get(key))
+        right_row = db_manager._make_record_serializable(right_rows.get(key))
+        changed_rows.append({
+            "key": key,
+            "left": left_row,
+            "right": right_row,
+            "changed_columns": [c for c in left.columns if left_row.get(c) != right_row.get(c)],
+        })
+
+    return {
+        "table": table_name,
+        "left": left_env,
+        "right": right_env,
+        "primary_key": left.pk,
+        "identical": not (keys["only_in_left"] or keys["only_in_right"] or keys["changed"]),
+        "summary": {
+            "only_in_left": len(keys["only_in_left"]),
+            "only_in_right": len(keys["only_in_right"]),
+            "changed": len(keys["changed"]),
+        },
+        "truncated": any(len(keys[k]) > max_rows for k in ("only_in_left", "only_in_right", "changed")),
+        "only_in_left": [db_manager._make_record_serializable(left_rows[k]) for k in only_in_left if k in left_rows],
+        "only_in_right": [db_manager._make_record_serializable(right_rows[k]) for k in only_in_right if k in right_rows],
+        "changed": changed_rows,
+        "stats": keys["stats"],
+    }
@@ -13,6 +13,43 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Profiling settings
+    SLOW_QUERY_THRESHOLD_MS: int = 500
+    SLOW_QUERY_EXPLAIN: bool = True
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = 10000
+
+    # Read replica routing
+    READ_YOUR_WRITES_SECONDS: int = 5
+    REPLICA_MAX_LAG_SECONDS: float = 10.0
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 2.0
+
+    # Identical concurrent table reads share one query; encoded pages (and aggregate
+    # and saved query results) are kept this long
+    TABLE_READ_CACHE_TTL_SECONDS: float = 5.0
+    TABLE_READ_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # Cross-environment (/all/...) reads: default per-request deadline and shared worker threads
+    FANOUT_TIMEOUT_SECONDS: float = 5.0
+    FANOUT_MAX_WORKERS: int = 32
+
+    # Database driver: "psycopg2" or "psycopg" (psycopg 3, with server-side prepared
+    # statements after DB_PREPARE_THRESHOLD runs of a statement; -1 turns them off)
+    DB_DRIVER: str = "psycopg2"
+    DB_PREPARE_THRESHOLD: int = 5
+
+    # Text columns ("table.column,...") that get pg_trgm indexes for search, built at startup
+    # or via POST /{env}/admin/search-indexes; other columns are searched unindexed
+    SEARCH_INDEX_COLUMNS: str = "products.name,products.description"
+
+    # Structured logging: JSON lines on stdout written by a background thread; DEBUG records
+    # are kept with probability LOG_DEBUG_SAMPLE_RATE, and these keys are redacted wherever they appear
+    LOG_LEVEL: str = "INFO"
+    LOG_DEBUG_SAMPLE_RATE: float = 0.01
+    LOG_REDACT_FIELDS: str = "password,password_hash,token,access_token,secret,authorization,new_values,old_values,before_state,after_state,snapshot_data"
+
+    # Multi-worker mode: broadcast cache invalidations to the other worker processes
+    CACHE_INVALIDATION: bool = True
+
     class Config:
         # e.g. .env.dev, .env.test
         # The order is important. Variables from the right-most file will override
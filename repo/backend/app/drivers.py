@@ -0,0 +1,84 @@
+# app/drivers.py
+# PostgreSQL driver selection (psycopg2 or psycopg 3) and the few operations whose DBAPI
+# differs between them: engine URL and connect arguments, COPY, and pipelining
+#
+# With DB_DRIVER=psycopg, statements a pooled connection has run DB_PREPARE_THRESHOLD
+# times are prepared on the server, so hot reads (table pages, user lookups, pending
+# changes) skip parse and plan; and pipeline() lets a group of writes go out in one
+# round trip instead of one per statement. Set DB_PREPARE_THRESHOLD to -1 behind a
+# transaction-pooling PgBouncer, which cannot keep prepared statements.
+import contextlib
+
+from sqlalchemy.engine import make_url
+
+from .config import settings
+
+# DB_DRIVER value -> SQLAlchemy dialect+driver name
+DRIVERS = {
+    "psycopg2": "postgresql+psycopg2",
+    "psycopg": "postgresql+psycopg",
+}
+# Bytes read from the source stream per COPY ... FROM STDIN write
+COPY_BLOCK_SIZE = 1 << 20
+
+
+def uses_psycopg3() -> bool:
+    return settings.DB_DRIVER == "psycopg"
+
+
+def engine_url(url: str):
+    """Points a postgresql:// URL at the configured driver."""
+    if settings.DB_DRIVER not in DRIVERS:
+        raise ValueError(f"DB_DRIVER must be one of: {', '.join(DRIVERS)}")
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        return parsed
+    return parsed.set(drivername=DRIVERS[settings.DB_DRIVER])
+
+
+def connect_args(env: str) -> dict:
+    # Every pooled connection starts with the environment's schema on its search path
+    args = {"options": f"-csearch_path={env},public"}
+    if uses_psycopg3():
+        args["prepare_threshold"] = settings.DB_PREPARE_THRESHOLD if settings.DB_PREPARE_THRESHOLD >= 0 else None
+    return args
+
+
+@contextlib.contextmanager
+def pipeline(db):
+    """
+    Runs the block's statements on the session's connection in pipeline mode (psycopg 3):
+    they are sent without waiting for each other and the block's exit collects all their
+    results in one round trip. Only for statements whose results are not read (no SELECT,
+    no RETURNING, no ORM flush of new objects); commit after the block, since a commit
+    releases the session's connection. A no-op with psycopg2.
+    """
+    if not uses_psycopg3():
+        yield
+        return
+    with db.connection().connection.driver_connection.pipeline():
+        yield
+
+
+def copy_to(cursor, statement: str, params, buffer):
+    """Runs COPY (<statement with %s params>) TO STDOUT and writes the output into `buffer`."""
+    if hasattr(cursor, "copy_expert"):
+        query = cursor.mogrify(statement, params).decode()
+        cursor.copy_expert(f"COPY ({query}) TO STDOUT", buffer)
+        return
+    with cursor.copy(f"COPY ({statement}) TO STDOUT", params) as copy:
+        for data in copy:
+            buffer.write(data)
+
+
+def copy_from(cursor, statement: str, stream, size: int = COPY_BLOCK_SIZE):
+    """Runs `statement` (a COPY ... FROM STDIN) feeding it from the file-like `stream`."""
+    if hasattr(cursor, "copy_expert"):
+        cursor.copy_expert(statement, stream, size=size)
+        return
+    with cursor.copy(statement) as copy:
+        while True:
+            data = stream.read(size)
+            if not data:
+                break
+            copy.write(data)
@@ -0,0 +1,76 @@
+# app/fanout.py
+# Runs the same read against every configured environment concurrently, each through
+# its own pool, and collects whatever finished before the deadline
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable
+
+from fastapi import Request
+
+from . import db_manager
+from .config import settings
+
+# Upper bound for the `timeout` a caller may ask for
+MAX_TIMEOUT_SECONDS = 60.0
+
+# Shared rather than per request: a per-request executor would block on shutdown until
+# the slowest environment finished, which is exactly what the deadline is meant to avoid.
+# Reads still running after their deadline finish here and their results are dropped.
+_executor = ThreadPoolExecutor(max_workers=settings.FANOUT_MAX_WORKERS, thread_name_prefix="fanout")
+
+
+def _run_in_env(env: str, request: Request, table_name: str, read: Callable, timeout: float) -> dict:
+    started = time.perf_counter()
+    db = None
+    try:
+        target = db_manager.read_target(env, request)
+        # The server aborts whatever is still running at the deadline, so a slow
+        # environment does not keep holding this thread and its pooled connections
+        with db_manager.statement_timeout(timeout):
+            db = db_manager.open_read_session(env, target)
+            if table_name not in db_manager.get_all_table_names(db=db):
+                result = {"status": "not_found", "detail": f"Table '{table_name}' not found."}
+            else:
+                result = {"status": "ok", "served_by": target, **read(db)}
+    except ValueError as e:
+        result = {"status": "invalid", "detail": str(e)}
+    except Exception as e:
+        if db_manager.is_statement_timeout(e):
+            result = {"status": "timeout", "detail": f"Cancelled after {timeout:g}s"}
+        else:
+            result = {"status": "error", "detail": str(e)}
+    finally:
+        if db is not None:
+            db.close()
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def fan_out(request: Request, table_name: str, read: Callable, timeout: float) -> dict:
+    """
+    Calls read(db) for `table_name` in every configured environment at once and waits at
+    most `timeout` seconds. Each environment reports a status: "ok" (with the read's
+    result), "not_found", "invalid", "error" or "timeout"; `complete` is False if any
+    environment missed the deadline.
+    """
+    timeout = max(0.0, min(timeout, MAX_TIMEOUT_SECONDS))
+    futures = {
+        env: _executor.submit(_run_in_env, env, request, table_name, read, timeout)
+        for env, url in db_manager.DATABASE_URLS.items() if url
+    }
+    done, _ = wait(futures.values(), timeout=timeout)
+
+    environments = {}
+    for env, future in futures.items():
+        if future in done:
+            environments[env] = future.result()
+        else:
+            # Drops the read if it has not started yet; a running query is left to finish
+            future.cancel()
+            environments[env] = {"status": "timeout", "detail": f"No result within {timeout:g}s"}
+    return {
+        "table": table_name,
+        "timeout_seconds": timeout,
+        "complete": all(result["status"] != "timeout" for result in environments.values()),
+        "environments": environments,
+    }
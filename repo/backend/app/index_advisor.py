@@ -0,0 +1,187 @@
+# app/index_advisor.py
+# Usage-driven index recommendations for filtered table browsing
+import datetime
+import threading
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+
+from . import db_manager
+
+# Tables smaller than this are cheap to scan and never get a recommendation
+MIN_TABLE_ROWS = 10_000
+# Equality filters matching more than this fraction of the table won't benefit from a B-tree
+MAX_EQUALITY_SELECTIVITY = 0.2
+INDEX_METHODS = ("btree", "trgm")
+
+# (env, table, column, operator) -> usage counters
+_usage: dict = {}
+_usage_lock = threading.Lock()
+
+
+def record_filter_usage(env: str, table_name: str, filters: list[tuple[str, str]], duration_ms: float):
+    """Counts each (column, operator) a filtered read used, and how long the read took."""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    with _usage_lock:
+        for column, operator in filters:
+            stats = _usage.setdefault(
+                (env, table_name, column, operator),
+                {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "last_used": None}
+            )
+            stats["count"] += 1
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            stats["last_used"] = now
+
+
+def get_filter_usage(env: str) -> list[dict]:
+    with _usage_lock:
+        items = [(key, dict(stats)) for key, stats in _usage.items() if key[0] == env]
+    return [
+        {
+            "table": table, "column": column, "operator": operator,
+            "count": stats["count"],
+            "avg_ms": round(stats["total_ms"] / stats["count"], 3),
+            "max_ms": round(stats["max_ms"], 3),
+            "last_used": stats["last_used"].isoformat(),
+        }
+        for (_, table, column, operator), stats in items
+    ]
+
+
+def index_name(table_name: str, column: str, method: str) -> str:
+    # Trigram indexes share the naming used by the search endpoint
+    return f"ix_{table_name}_{column}_trgm" if method == "trgm" else f"ix_{table_name}_{column}"
+
+
+def index_ddl(env: str, table_name: str, column: str, method: str) -> str:
+    name = index_name(table_name, column, method)
+    if method == "trgm":
+        return f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON {env}."{table_name}" USING gin ("{column}" gin_trgm_ops)'
+    return f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON {env}."{table_name}" ("{column}")'
+
+
+def _existing_index_coverage(engine, env: str, table_name: str) -> dict:
+    """Maps column -> set of methods ('btree', 'trgm') for which it leads an existing index."""
+    coverage: dict = {}
+    with engine.connect() as connection:
+        rows = connection.execute(text("""
+            SELECT a.attname, am.amname, opc.opcname
+            FROM pg_index i
+            JOIN pg_class t ON t.oid = i.indrelid
+            JOIN pg_namespace n ON n.oid = t.relnamespace
+            JOIN pg_class ic ON ic.oid = i.indexrelid
+            JOIN pg_am am ON am.oid = ic.relam
+            JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = i.indkey[0]
+            JOIN pg_opclass opc ON opc.oid = i.indclass[0]
+            WHERE n.nspname = :schema AND t.relname = :table
+        """), {"schema": env, "table": table_name})
+        for row in rows:
+            if row.amname == "btree":
+                coverage.setdefault(row.attname, set()).add("btree")
+            elif "trgm" in row.opcname:
+                coverage.setdefault(row.attname, set()).add("trgm")
+    return coverage
+
+
+def recommend_indexes(db: Session) -> dict:
+    """
+    Combines recorded filter usage with pg_stat_user_tables and pg_stats to suggest
+    the indexes that would help the filters people actually run, most valuable first.
+    """
+    engine = db.get_engine()
+    env = db.get_env()
+    usage = get_filter_usage(env)
+    tables = sorted({u["table"] for u in usage})
+    if not tables:
+        return {"env": env, "usage": [], "recommendations": []}
+
+    with engine.connect() as connection:
+        table_stats = {
+            row.relname: dict(row._mapping) for row in connection.execute(text(
+                "SELECT relname, n_live_tup, seq_scan, seq_tup_read, idx_scan "
+                "FROM pg_stat_user_tables WHERE schemaname = :schema AND relname = ANY(:tables)"
+            ), {"schema": env, "tables": tables})
+        }
+        column_stats = {
+            (row.tablename, row.attname): dict(row._mapping) for row in connection.execute(text(
+                "SELECT tablename, attname, n_distinct, null_frac, correlation "
+                "FROM pg_stats WHERE schemaname = :schema AND tablename = ANY(:tables)"
+            ), {"schema": env, "tables": tables})
+        }
+
+    # Group usage per column: one index can serve all its operators
+    per_column: dict = {}
+    for u in usage:
+        entry = per_column.setdefault((u["table"], u["column"]), {"operators": {}, "count": 0, "total_ms": 0.0})
+        entry["operators"][u["operator"]] = u["count"]
+        entry["count"] += u["count"]
+        entry["total_ms"] += u["avg_ms"] * u["count"]
+
+    recommendations = []
+    coverage_by_table = {t: _existing_index_coverage(engine, env, t) for t in tables}
+    for (table_name, column), entry in per_column.items():
+        stats = table_stats.get(table_name, {})
+        rows = stats.get("n_live_tup") or 0
+        col_stats = column_stats.get((table_name, column), {})
+        n_distinct = col_stats.get("n_distinct")
+        distinct_values = (-n_distinct * rows if n_distinct < 0 else n_distinct) if n_distinct is not None else None
+        covered = coverage_by_table[table_name].get(column, set())
+
+        methods = []
+        if "LIKE" in entry["operators"]:
+            methods.append("trgm")
+        if set(entry["operators"]) - {"LIKE", "!="}:
+            methods.append("btree")
+
+        for method in methods:
+            if method in covered:
+                continue
+            if rows < MIN_TABLE_ROWS:
+                continue
+            reasons = []
+            if method == "btree" and set(entry["operators"]) <= {"="} and distinct_values:
+                selectivity = 1 / distinct_values
+                if selectivity > MAX_EQUALITY_SELECTIVITY:
+                    continue
+                reasons.append(f"each value matches ~{selectivity:.2%} of rows")
+            if stats.get("seq_scan"):
+                reasons.append(f"{stats['seq_scan']} sequential scans on a {rows}-row table")
+            recommendations.append({
+                "table": table_name,
+                "column": column,
+                "method": method,
+                "operators": entry["operators"],
+                "uses": entry["count"],
+                "avg_ms": round(entry["total_ms"] / entry["count"], 3),
+                "table_rows": rows,
+                "n_distinct": n_distinct,
+                "correlation": col_stats.get("correlation"),
+                "reason": "; ".join(reasons) or "frequently filtered column without an index",
+                "ddl": index_ddl(env, table_name, column, method),
+                # Time spent in queries an index could have served
+                "score": round(entry["total_ms"], 3),
+            })
+
+    recommendations.sort(key=lambda r: r["score"], reverse=True)
+    return {"env": env, "usage": usage, "recommendations": recommendations}
+
+
+def create_index(db: Session, table_name: str, column: str, method: str) -> str:
+    """Creates the index without blocking writes (CREATE INDEX CONCURRENTLY). Returns the DDL run."""
+    engine = db.get_engine()
+    env = db.get_env()
+    if method not in INDEX_METHODS:
+        raise ValueError(f"Index method must be one of: {', '.join(INDEX_METHODS)}")
+    if table_name not in inspect(engine).get_table_names(schema=env):
+        raise LookupError(f"Table '{table_name}' not found.")
+    if column not in {c["name"] for c in inspect(engine).get_columns(table_name, schema=env)}:
+        raise ValueError(f"Column '{column}' not found in table '{table_name}'")
+
+    ddl = index_ddl(env, table_name, column, method)
+    # CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if method == "trgm":
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        connection.execute(text(ddl))
+    db_manager.invalidate_schema_caches(env)
+    return ddl
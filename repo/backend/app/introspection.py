@@ -0,0 +1,202 @@
+# app/introspection.py
+# Whole-schema catalog (columns, keys, indexes, foreign keys) built from a few bulk
+# pg_catalog queries and cached until the schema's DDL fingerprint changes
+import threading
+import time
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# How long schema_fingerprint trusts the fingerprint it last read for an environment
+FINGERPRINT_CHECK_SECONDS = 1.0
+
+# env -> (fingerprint, {table_name: table metadata})
+_catalogs: dict = {}
+# env -> (checked_at, fingerprint)
+_fingerprints: dict = {}
+_catalogs_lock = threading.Lock()
+
+# Relations listed by the catalog: ordinary, partitioned, views and materialized views
+_RELKINDS = "('r', 'p', 'v', 'm')"
+
+# Changes whenever a relation, column or constraint in the schema is created, altered or
+# dropped (each of those writes a new catalog row version, i.e. a new xmin), but not on
+# ANALYZE/VACUUM, which update statistics in place. Estimated row counts come along for free.
+_FINGERPRINT_SQL = f"""
+    WITH rels AS (
+        SELECT c.oid, c.relname, c.relkind, c.reltuples, c.xmin::text AS version
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = :schema
+    )
+    SELECT
+        md5(concat_ws('|',
+            (SELECT string_agg(oid::text || '.' || version, ',' ORDER BY oid) FROM rels),
+            (SELECT string_agg(a.attrelid::text || '.' || a.attnum || '.' || a.xmin::text, ','
+                               ORDER BY a.attrelid, a.attnum)
+             FROM pg_attribute a JOIN rels r ON r.oid = a.attrelid WHERE a.attnum > 0),
+            (SELECT string_agg(co.oid::text || '.' || co.xmin::text, ',' ORDER BY co.oid)
+             FROM pg_constraint co JOIN rels r ON r.oid = co.conrelid)
+        )) AS fingerprint,
+        (SELECT json_object_agg(relname, reltuples) FROM rels WHERE relkind IN {_RELKINDS}) AS row_estimates
+"""
+
+_COLUMNS_SQL = f"""
+    SELECT c.relname AS table_name, c.relkind, a.attname AS name,
+           format_type(a.atttypid, a.atttypmod) AS type,
+           NOT a.attnotnull AS nullable,
+           pg_get_expr(d.adbin, d.adrelid) AS "default"
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+    LEFT JOIN pg_attrdef d ON d.adrelid = c.oid AND d.adnum = a.attnum
+    WHERE n.nspname = :schema AND c.relkind IN {_RELKINDS}
+    ORDER BY c.relname, a.attnum
+"""
+
+_INDEXES_SQL = """
+    SELECT t.relname AS table_name, i.relname AS name, am.amname AS method,
+           ix.indisunique AS is_unique, ix.indisprimary AS is_primary,
+           ARRAY(
+               SELECT a.attname FROM unnest(ix.indkey) WITH ORDINALITY AS k(attnum, ord)
+               JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = k.attnum
+               ORDER BY k.ord
+           ) AS columns,
+           pg_get_indexdef(ix.indexrelid) AS definition
+    FROM pg_index ix
+    JOIN pg_class t ON t.oid = ix.indrelid
+    JOIN pg_class i ON i.oid = ix.indexrelid
+    JOIN pg_am am ON am.oid = i.relam
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    WHERE n.nspname = :schema
+    ORDER BY t.relname, i.relname
+"""
+
+_FOREIGN_KEYS_SQL = """
+    SELECT t.relname AS table_name, co.conname AS name,
+           ARRAY(
+               SELECT a.attname FROM unnest(co.conkey) WITH ORDINALITY AS k(attnum, ord)
+               JOIN pg_attribute a ON a.attrelid = co.conrelid AND a.attnum = k.attnum
+               ORDER BY k.ord
+           ) AS columns,
+           rn.nspname AS referred_schema, rt.relname AS referred_table,
+           ARRAY(
+               SELECT a.attname FROM unnest(co.confkey) WITH ORDINALITY AS k(attnum, ord)
+               JOIN pg_attribute a ON a.attrelid = co.confrelid AND a.attnum = k.attnum
+               ORDER BY k.ord
+           ) AS referred_columns
+    FROM pg_constraint co
+    JOIN pg_class t ON t.oid = co.conrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    JOIN pg_class rt ON rt.oid = co.confrelid
+    JOIN pg_namespace rn ON rn.oid = rt.relnamespace
+    WHERE n.nspname = :schema AND co.contype = 'f'
+    ORDER BY t.relname, co.conname
+"""
+
+_KINDS = {"r": "table", "p": "table", "v": "view", "m": "materialized_view"}
+
+
+def _load_catalog(connection, env: str) -> dict:
+    """Builds {table_name: metadata} for the whole schema with three catalog queries."""
+    tables: dict = {}
+    for row in connection.execute(text(_COLUMNS_SQL), {"schema": env}).mappings():
+        table = tables.setdefault(row["table_name"], {
+            "name": row["table_name"],
+            "kind": _KINDS[row["relkind"]],
+            "columns": [],
+            "primary_key": [],
+            "indexes": [],
+            "foreign_keys": [],
+        })
+        table["columns"].append({
+            "name": row["name"],
+            "type": row["type"],
+            "nullable": row["nullable"],
+            "primary_key": False,
+            "default": row["default"],
+        })
+
+    for row in connection.execute(text(_INDEXES_SQL), {"schema": env}).mappings():
+        table = tables.get(row["table_name"])
+        if table is None:
+            continue
+        table["indexes"].append({
+            "name": row["name"],
+            "columns": list(row["columns"]),
+            "unique": row["is_unique"],
+            "method": row["method"],
+            "definition": row["definition"],
+        })
+        if row["is_primary"]:
+            table["primary_key"] = list(row["columns"])
+            for column in table["columns"]:
+                column["primary_key"] = column["name"] in table["primary_key"]
+
+    for row in connection.execute(text(_FOREIGN_KEYS_SQL), {"schema": env}).mappings():
+        table = tables.get(row["table_name"])
+        if table is None:
+            continue
+        table["foreign_keys"].append({
+            "name": row["name"],
+            "columns": list(row["columns"]),
+            "referred_schema": row["referred_schema"],
+            "referred_table": row["referred_table"],
+            "referred_columns": list(row["referred_columns"]),
+        })
+    return tables
+
+
+def get_schema_catalog(db: Session) -> dict:
+    """
+    Every table in the environment with its columns, keys, indexes and estimated row count.
+    One fingerprint query per call; the full catalog is only re-read after DDL.
+    """
+    env = db.get_env()
+    with db.get_engine().connect() as connection:
+        row = connection.execute(text(_FINGERPRINT_SQL), {"schema": env}).mappings().one()
+        fingerprint, row_estimates = row["fingerprint"], row["row_estimates"] or {}
+        _fingerprints[env] = (time.monotonic(), fingerprint)
+
+        cached = _catalogs.get(env)
+        if cached is not None and cached[0] == fingerprint:
+            tables = cached[1]
+        else:
+            tables = _load_catalog(connection, env)
+            with _catalogs_lock:
+                _catalogs[env] = (fingerprint, tables)
+
+    result = []
+    for name in sorted(tables):
+        estimate = row_estimates.get(name)
+        # reltuples is -1 for tables that were never vacuumed or analyzed
+        result.append({**tables[name], "estimated_rows": int(estimate) if estimate is not None and estimate >= 0 else None})
+    return {"env": env, "fingerprint": fingerprint, "tables": result}
+
+
+def schema_fingerprint(engine, env: str) -> str:
+    """
+    The schema's DDL fingerprint (see _FINGERPRINT_SQL), re-read at most every
+    FINGERPRINT_CHECK_SECONDS, for caches of anything derived from the schema.
+    """
+    cached = _fingerprints.get(env)
+    if cached is not None and time.monotonic() - cached[0] < FINGERPRINT_CHECK_SECONDS:
+        return cached[1]
+    with engine.connect() as connection:
+        fingerprint = connection.execute(text(_FINGERPRINT_SQL), {"schema": env}).mappings().one()["fingerprint"]
+    _fingerprints[env] = (time.monotonic(), fingerprint)
+    return fingerprint
+
+
+def invalidate(env: str):
+    with _catalogs_lock:
+        _catalogs.pop(env, None)
+        _fingerprints.pop(env, None)
+
+
+def get_table_columns(db: Session, table_name: str) -> list[dict]:
+    """Column metadata for one table, served from the cached catalog."""
+    catalog = get_schema_catalog(db)
+    table = next((t for t in catalog["tables"] if t["name"] == table_name), None)
+    if table is None:
+        raise LookupError(f"Table '{table_name}' not found.")
+    return table["columns"]
@@ -0,0 +1,130 @@
+# app/invalidation.py
+# Cross-worker cache invalidation over Postgres LISTEN/NOTIFY
+#
+# Every worker process keeps its own in-memory caches (table versions, reflected tables,
+# read-your-writes pins). When one worker changes something another worker may have
+# cached, it publishes a small JSON message on the environment's database; a listener
+# thread in every other worker applies it to its local state.
+import json
+import logging
+import os
+import select
+import socket
+import threading
+import uuid
+from typing import Callable
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from . import drivers
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "sagole_invalidate"
+# Lets a worker ignore the messages it published itself
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+# Seconds between checks of the stop flag, and before reconnecting a dropped listener
+POLL_INTERVAL = 1.0
+RECONNECT_DELAY = 2.0
+
+# kind -> handlers called as handler(env, message)
+_handlers: dict[str, list[Callable]] = {}
+# Called after a listener (re)connects: messages may have been missed while it was down
+_reset_handlers: list[Callable] = []
+_listeners: list[threading.Thread] = []
+_stop = threading.Event()
+
+
+def register_handler(kind: str, handler: Callable):
+    _handlers.setdefault(kind, []).append(handler)
+
+
+def register_reset_handler(handler: Callable):
+    _reset_handlers.append(handler)
+
+
+def publish(env: str, kind: str, **data):
+    """Tells the other workers about a change. Failures are logged, never raised."""
+    if not settings.CACHE_INVALIDATION:
+        return
+    from . import db_manager
+
+    payload = json.dumps({"origin": PROCESS_ID, "kind": kind, **data}, default=str)
+    try:
+        with db_manager.get_engine(env).connect() as connection:
+            connection.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+            connection.commit()
+    except Exception as e:
+        logger.warning("invalidation publish failed", extra={"fields": {"env": env, "kind": kind, "error": str(e)}})
+
+
+def _dispatch(env: str, payload: str):
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        return
+    if message.get("origin") == PROCESS_ID:
+        return
+    for handler in _handlers.get(message.get("kind"), []):
+        try:
+            handler(env, message)
+        except Exception:
+            logger.error("invalidation handler failed", exc_info=True, extra={"fields": {"env": env, "kind": message.get("kind")}})
+
+
+def _receive(env: str, connection):
+    """Dispatches notifications until the listener is stopped (psycopg2 or psycopg 3 connection)."""
+    while not _stop.is_set():
+        if not hasattr(connection, "poll"):
+            for notify in connection.notifies(timeout=POLL_INTERVAL):
+                _dispatch(env, notify.payload)
+            continue
+        if select.select([connection], [], [], POLL_INTERVAL) == ([], [], []):
+            continue
+        connection.poll()
+        while connection.notifies:
+            _dispatch(env, connection.notifies.pop(0).payload)
+
+
+def _listen(env: str, url: str):
+    engine = create_engine(drivers.engine_url(url), poolclass=NullPool)
+    while not _stop.is_set():
+        raw_connection = None
+        try:
+            raw_connection = engine.raw_connection()
+            connection = raw_connection.driver_connection
+            connection.autocommit = True
+            connection.cursor().execute(f"LISTEN {CHANNEL}")
+            for handler in _reset_handlers:
+                handler(env)
+            _receive(env, connection)
+        except Exception as e:
+            logger.warning("invalidation listener disconnected", extra={"fields": {"env": env, "error": str(e)}})
+            _stop.wait(RECONNECT_DELAY)
+        finally:
+            if raw_connection is not None:
+                try:
+                    raw_connection.close()
+                except Exception:
+                    pass
+    engine.dispose()
+
+
+def start_listeners(database_urls: dict):
+    """Starts one listener thread per environment (idempotent)."""
+    if not settings.CACHE_INVALIDATION or _listeners:
+        return
+    _stop.clear()
+    for env, url in database_urls.items():
+        thread = threading.Thread(target=_listen, args=(env, url), name=f"invalidation-{env}", daemon=True)
+        thread.start()
+        _listeners.append(thread)
+
+
+def stop_listeners():
+    _stop.set()
+    for thread in _listeners:
+        thread.join(timeout=POLL_INTERVAL * 2)
+    _listeners.clear()
@@ -0,0 +1,134 @@
+# app/logs.py
+# Structured JSON logging that stays off the request path
+#
+# Request threads only build a LogRecord and put it on an in-memory queue; a single
+# listener thread serializes it to JSON and writes it out, so a slow stdout or log
+# shipper never shows up in request latency. Every record carries the id of the request
+# that produced it, high-volume DEBUG events are sampled, and fields that hold passwords,
+# tokens or row contents are redacted before they are written.
+#
+#   logger = logging.getLogger(__name__)
+#   logger.info("change approved", extra={"fields": {"change_id": 7, "duration_ms": 12.5}})
+import contextvars
+import datetime
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from .config import settings
+
+# Parent of every module logger in the app (logging.getLogger(__name__))
+ROOT_LOGGER = "app"
+REDACTED = "[redacted]"
+
+# Id of the request being handled; set by the middleware in main.py and carried into
+# threadpool endpoints and background tasks with the rest of the context
+request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+_listener: Optional[QueueListener] = None
+_lock = threading.Lock()
+
+
+def _redact(value, keys: frozenset):
+    if isinstance(value, dict):
+        return {k: REDACTED if str(k).lower() in keys else _redact(v, keys) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_redact(v, keys) for v in value]
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, request_id, then the record's fields."""
+
+    def __init__(self, redact_fields):
+        super().__init__()
+        self.redact_fields = frozenset(f.strip().lower() for f in redact_fields if f.strip())
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(_redact(fields, self.redact_fields))
+        if record.exc_info:
+            entry["exc_type"] = record.exc_info[0].__name__
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _ContextFilter(logging.Filter):
+    """
+    Stamps the request id and samples DEBUG records. Attached to the QueueHandler, so it
+    runs on the thread that logs, where the request's context variables are set; moved to
+    the listener's handlers it would see none of them.
+    """
+
+    def __init__(self, debug_sample_rate: float):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.DEBUG:
+            # A record may ask to always be kept with extra={"sample_rate": 1.0}
+            rate = getattr(record, "sample_rate", self.debug_sample_rate)
+            if rate < 1.0 and random.random() >= rate:
+                return False
+        record.request_id = request_id.get()
+        return True
+
+
+class _DeferredQueueHandler(QueueHandler):
+    # QueueHandler.prepare() formats the whole record on the calling thread (it is meant
+    # for queues that cross processes). The listener lives in this process, so only the
+    # mutable parts are pinned here and all formatting happens on the listener thread.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        fields = getattr(record, "fields", None)
+        if fields:
+            record.fields = dict(fields)
+        return record
+
+
+def configure_logging():
+    """Routes the app's loggers through the queue; safe to call more than once."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(JsonFormatter(settings.LOG_REDACT_FIELDS.split(",")))
+
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        handler = _DeferredQueueHandler(records)
+        handler.addFilter(_ContextFilter(settings.LOG_DEBUG_SAMPLE_RATE))
+
+        logger = logging.getLogger(ROOT_LOGGER)
+        logger.handlers = [handler]
+        logger.setLevel(settings.LOG_LEVEL.upper())
+        logger.propagate = False
+
+        _listener = QueueListener(records, output, respect_handler_level=True)
+        _listener.start()
+
+
+def stop_logging():
+    """Writes out everything still queued and stops the listener thread."""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener = None
+        logging.getLogger(ROOT_LOGGER).handlers = []
@@ -1,53 +1,24 @@
 # app/main.py
 # Main entry point for the FastAPI application
-from fastapi import FastAPI
+import logging
+import time
+import uuid
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, text, MetaData
+from fastapi.responses import PlainTextResponse
 
 from app.api import router as api_router
-from app.database import Base
-from app import db_manager
-from app import models  # Registers all models with Base.metadata
+from app import db_manager, metrics, profiling, auth, bootstrap, invalidation, logs
 from app.config import settings
 
-# --- Part 1: Setup that runs when the file is first loaded ---
+# JSON logs written by a background thread; configured before anything logs at startup
+logs.configure_logging()
+logger = logging.getLogger(__name__)
 
-print("--- Initializing application setup ---")
+# Schema/table setup and seeding run at startup (see on_startup), not at import, so each
+# worker process of a multi-worker deployment goes through the advisory-locked bootstrap.
 
-# Ensure schemas and tables are created for each environment (multi-tenant setup)
-for env, db_url in db_manager.DATABASE_URLS.items():
-    print(f"Processing environment: '{env}'...")
-    try:
-        engine = create_engine(db_url)
-        
-        # Create the schema if it doesn't already exist.
-        with engine.connect() as connection:
-            print(f"  -> Ensuring schema '{env}' exists...")
-            connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {env}"))
-            connection.commit()
-            print(f"  -> Schema '{env}' is ready.")
-
-        # Create all tables for the current environment's schema.
-        # Create a new metadata object to avoid conflicts between environments
-        env_metadata = MetaData(schema=env)
-        
-        # Copy all tables from the base metadata to the environment-specific metadata
-        for table in Base.metadata.tables.values():
-            table.tometadata(env_metadata)
-        
-        # Create all tables with the environment-specific metadata
-        env_metadata.create_all(bind=engine)
-        print(f"  -> Tables for '{env}' created successfully.")
-
-    except Exception as e:
-        print(f"  -> ERROR processing environment '{env}': {e}")
-        import traceback
-        print(f"  -> Traceback: {traceback.format_exc()}")
-
-print("--- Application setup finished ---")
-
-
-# --- Part 2: Application Configuration ---
+# --- Part 1: Application Configuration ---
 app = FastAPI(title="Sagole Database Admin Panel API")
 
 # Allow CORS for local frontend development
@@ -66,20 +37,86 @@ app.add_middleware(
 app.include_router(api_router, prefix="/api/v1")
 
 
-# --- Part 3: Events and Basic Routes ---
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    # Opt-in with an "X-Profile: 1" header or "?profile=1"; only honoured for admin tokens
+    requested = request.headers.get("x-profile") or request.query_params.get("profile")
+    if requested not in ("1", "true"):
+        return await call_next(request)
+    authorization = request.headers.get("authorization", "")
+    token = authorization[7:] if authorization.lower().startswith("bearer ") else ""
+    if not token or auth.get_token_role(token) != "admin":
+        return await call_next(request)
+
+    profile, context_token = profiling.start_profile(request.method, request.url.path)
+    try:
+        response = await call_next(request)
+    finally:
+        profiling.finish_profile(profile, context_token)
+    response.headers["X-Profile-Id"] = profile.id
+    response.headers["Server-Timing"] = profile.server_timing()
+    return response
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    # Label by route template (e.g. /api/v1/{env}/tables) so paths with IDs don't explode cardinality
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        metrics.HTTP_REQUEST_DURATION.observe(request.method, route_path, str(status_code), value=elapsed)
+        logger.info("request", extra={"fields": {
+            "method": request.method, "route": route_path, "status": status_code,
+            "duration_ms": round(elapsed * 1000, 2),
+        }})
+
+
+# Registered last, so it runs outermost: everything logged while handling the request,
+# including the access line above, carries its id. A caller-supplied X-Request-ID is kept.
+@app.middleware("http")
+async def tag_request(request: Request, call_next):
+    request_id = request.headers.get("x-request-id", "")
+    if not request_id or len(request_id) > 128:
+        request_id = uuid.uuid4().hex
+    context_token = logs.request_id.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        logs.request_id.reset(context_token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
+# --- Part 2: Events and Basic Routes ---
 @app.on_event("startup")
 def on_startup():
-    print("--- Running startup tasks ---")
-    print("Seeding all configured databases...")
-    for env in db_manager.DATABASE_URLS.keys():
-        print(f"  -> Seeding environment: '{env}'")
-        try:
-            db_manager.seed_database(schema=env)
-            print(f"  -> Seeding for '{env}' complete.")
-        except Exception as e:
-            print(f"  -> ERROR seeding environment '{env}': {e}")
-    print("--- Startup tasks finished ---")
+    started = time.perf_counter()
+    # No-op unless a previous shutdown stopped the listener (e.g. repeated test clients)
+    logs.configure_logging()
+    # Creates schemas/tables and seeds every configured database; safe with many workers
+    bootstrap.bootstrap_all(seed=True)
+    # Apply cache invalidations published by the other worker processes
+    invalidation.start_listeners(db_manager.DATABASE_URLS)
+    logger.info("startup finished", extra={"fields": {"duration_ms": round((time.perf_counter() - started) * 1000, 2)}})
+
+@app.on_event("shutdown")
+def on_shutdown():
+    invalidation.stop_listeners()
+    # Flush whatever is still queued before the process exits
+    logs.stop_logging()
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome! The Sagole Admin API is running."}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
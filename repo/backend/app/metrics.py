@@ -0,0 +1,202 @@
+# app/metrics.py
+# In-process metrics exposed in the Prometheus text format at /metrics
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+from sqlalchemy import event
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+_registry: list = []
+_collectors: list[Callable[[], None]] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: tuple) -> tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(labels)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.extend(self._render_sample(labels, value))
+        return lines
+
+    def _render_sample(self, labels: tuple, value) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1.0):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, *labels, value: float):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *labels, value: float):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, upper_bound in enumerate(self.buckets):
+                if value <= upper_bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(*labels, value=time.perf_counter() - start)
+
+    def _render_sample(self, labels: tuple, state) -> list[str]:
+        lines = []
+        cumulative = 0
+        for upper_bound, count in zip(self.buckets, state["counts"]):
+            cumulative += count
+            le = _format_labels(self.labelnames, labels, f'le="{upper_bound}"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        inf = _format_labels(self.labelnames, labels, 'le="+Inf"')
+        lines.append(f"{self.name}_bucket{inf} {state['count']}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {state['sum']}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {state['count']}")
+        return lines
+
+
+def register_collector(collector: Callable[[], None]):
+    """Registers a callable that refreshes gauges right before each scrape."""
+    _collectors.append(collector)
+
+
+def render() -> str:
+    for collector in _collectors:
+        collector()
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Metric definitions ---
+
+HTTP_REQUEST_DURATION = Histogram(
+    "sagole_http_request_duration_seconds", "HTTP request latency by route.", ("method", "route", "status")
+)
+DB_QUERY_DURATION = Histogram(
+    "sagole_db_query_duration_seconds", "SQL statement execution time.", ("env", "table", "operation")
+)
+DB_QUERY_ERRORS = Counter(
+    "sagole_db_query_errors_total", "SQL statements that raised an error.", ("env", "table", "operation")
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "sagole_db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.", ("env",)
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "sagole_db_pool_connections", "Pooled connections by state.", ("env", "state")
+)
+DB_REPLICA_LAG = Gauge(
+    "sagole_db_replica_lag_seconds", "Last measured replication lag of each environment's read replica.", ("env",)
+)
+DB_READ_ROUTING = Counter(
+    "sagole_db_read_routing_total", "Read-only requests by the database that served them.", ("env", "target")
+)
+TABLE_READ_CACHE = Counter(
+    "sagole_table_read_cache_total", "Table page reads by how they were served (hit, shared, miss).", ("env", "outcome")
+)
+SNAPSHOT_DURATION = Histogram(
+    "sagole_snapshot_duration_seconds", "Time to read and serialize a table snapshot.", ("table",)
+)
+SNAPSHOT_SIZE_BYTES = Histogram(
+    "sagole_snapshot_size_bytes", "Serialized size of table snapshots.", ("table",), buckets=SIZE_BUCKETS
+)
+SNAPSHOT_ROWS = Histogram(
+    "sagole_snapshot_rows", "Number of rows captured per table snapshot.", ("table",), buckets=SIZE_BUCKETS
+)
+BCRYPT_DURATION = Histogram(
+    "sagole_bcrypt_duration_seconds", "Time spent hashing or verifying passwords.", ("operation",)
+)
+
+
+# --- SQLAlchemy instrumentation ---
+
+_TABLE_PATTERN = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+(?:"?\w+"?\.)?"?(\w+)"?', re.IGNORECASE)
+
+
+def statement_labels(statement: str) -> tuple[str, str]:
+    """Returns (table, operation) labels for a SQL statement."""
+    stripped = statement.lstrip()
+    operation = stripped.split(None, 1)[0].upper() if stripped else "UNKNOWN"
+    match = _TABLE_PATTERN.search(statement)
+    return (match.group(1) if match else "none"), operation
+
+
+def instrument_engine(engine, env: str):
+    """Times every statement run through the engine, labelled by environment and table."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["metrics_query_start"].pop()
+        table, operation = statement_labels(statement)
+        DB_QUERY_DURATION.observe(env, table, operation, value=time.perf_counter() - start)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("metrics_query_start"):
+            conn.info["metrics_query_start"].pop()
+        table, operation = statement_labels(exception_context.statement or "")
+        DB_QUERY_ERRORS.inc(env, table, operation)
@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, Integer, String, JSON, DateTime, Enum, Boolean, Numeric, Text
+from sqlalchemy import Column, Integer, String, JSON, DateTime, Enum, Boolean, Numeric, Text, Index
 from sqlalchemy.sql import func
 from .database import Base
 from .config import settings
@@ -36,6 +36,10 @@ class ChangeStatus(enum.Enum):
     PENDING = "PENDING"
     APPROVED = "APPROVED"
     REJECTED = "REJECTED"
+    # A bulk delete that stopped part-way; its summary says how many rows were deleted
+    FAILED = "FAILED"
+    # A bulk delete whose chunks are still being deleted
+    RUNNING = "RUNNING"
 
 class PendingChange(Base):
     __tablename__ = "pending_changes"
@@ -70,6 +74,22 @@ class AuditLog(Base):
     approved_by_id = Column(Integer, nullable=False)
     approved_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
+    # as-of reads look up a table's changes since a point in time
+    __table_args__ = (Index("ix_audit_log_table_name_approved_at", "table_name", "approved_at"),)
+
+class SavedQuery(Base):
+    __tablename__ = 'saved_queries'
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), unique=True, nullable=False)
+    description = Column(Text)
+    table_name = Column(String, nullable=False)
+    definition = Column(JSON, nullable=False)  # columns / filters / group_by / aggregates / limit
+    parameters = Column(JSON, nullable=False, default=dict)  # parameter name -> default value (null = required)
+    created_by = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class Version(Base):
     __tablename__ = 'versions'
 
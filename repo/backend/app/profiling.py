@@ -0,0 +1,214 @@
+# app/profiling.py
+# Opt-in per-request SQL profiling and slow-query capture with EXPLAIN plans
+import contextvars
+import datetime
+import functools
+import itertools
+import json
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from sqlalchemy import event
+
+from . import metrics
+from .config import settings
+
+# How many finished profiles and slow queries are kept for browsing
+PROFILE_BUFFER_SIZE = 100
+SLOW_QUERY_BUFFER_SIZE = 200
+
+_current_profile: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "current_profile", default=None
+)
+_profiles: deque = deque(maxlen=PROFILE_BUFFER_SIZE)
+_slow_queries: deque = deque(maxlen=SLOW_QUERY_BUFFER_SIZE)
+_slow_query_ids = itertools.count(1)
+_buffers_lock = threading.Lock()
+# EXPLAIN ANALYZE re-runs the statement, so it is done off the request path, one at a time
+_explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+# Set while a table-read helper runs (see capture_plans). Plans are only captured for the
+# statements those helpers issue: bootstrap, invalidation, promotion and approval SQL is
+# never re-run, even when it is a slow SELECT.
+_capture_plans: contextvars.ContextVar[bool] = contextvars.ContextVar("capture_plans", default=False)
+# Functions whose effects a rollback does not undo (session advisory locks, sequences,
+# notifications); a statement calling any of them is never re-run
+_UNSAFE_FUNCTIONS = re.compile(r"\b(pg_(try_)?advisory\w*|setval|nextval|pg_notify)\s*\(", re.IGNORECASE)
+
+
+class RequestProfile:
+    """Every SQL statement run while handling one profiled request."""
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self._started = time.perf_counter()
+        self.total_ms: Optional[float] = None
+        self.statements: list[dict] = []
+        self._lock = threading.Lock()
+
+    def record(self, env: str, statement: str, duration_ms: float):
+        table, operation = metrics.statement_labels(statement)
+        with self._lock:
+            self.statements.append({
+                "env": env,
+                "table": table,
+                "operation": operation,
+                # Catalog lookups are table reflection, everything else is the request's own SQL
+                "category": "reflection" if table.startswith("pg_") or "information_schema" in statement else "query",
+                "duration_ms": round(duration_ms, 3),
+                "statement": statement,
+            })
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self._started) * 1000
+
+    def summary(self) -> dict:
+        db_ms = sum(s["duration_ms"] for s in self.statements)
+        by_category: dict = {}
+        by_table: dict = {}
+        for s in self.statements:
+            by_category[s["category"]] = by_category.get(s["category"], 0.0) + s["duration_ms"]
+            by_table[s["table"]] = by_table.get(s["table"], 0.0) + s["duration_ms"]
+        return {
+            "statement_count": len(self.statements),
+            "total_ms": round(self.total_ms or 0.0, 3),
+            "db_ms": round(db_ms, 3),
+            # Time outside the database: serialisation, Python-side processing, framework overhead
+            "app_ms": round(max((self.total_ms or 0.0) - db_ms, 0.0), 3),
+            "db_ms_by_category": {k: round(v, 3) for k, v in by_category.items()},
+            "db_ms_by_table": {k: round(v, 3) for k, v in by_table.items()},
+        }
+
+    def server_timing(self) -> str:
+        summary = self.summary()
+        return (
+            f'db;dur={summary["db_ms"]};desc="{summary["statement_count"]} statements", '
+            f'app;dur={summary["app_ms"]}, total;dur={summary["total_ms"]}'
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at.isoformat(),
+            "summary": self.summary(),
+            "statements": self.statements,
+        }
+
+
+def start_profile(method: str, path: str) -> tuple[RequestProfile, contextvars.Token]:
+    profile = RequestProfile(method, path)
+    return profile, _current_profile.set(profile)
+
+
+def finish_profile(profile: RequestProfile, token: contextvars.Token):
+    _current_profile.reset(token)
+    profile.finish()
+    with _buffers_lock:
+        _profiles.append(profile)
+
+
+def list_profiles() -> list[dict]:
+    with _buffers_lock:
+        profiles = list(_profiles)
+    return [
+        {"id": p.id, "method": p.method, "path": p.path, "started_at": p.started_at.isoformat(), "summary": p.summary()}
+        for p in reversed(profiles)
+    ]
+
+
+def get_profile(profile_id: str) -> dict:
+    with _buffers_lock:
+        profile = next((p for p in _profiles if p.id == profile_id), None)
+    if profile is None:
+        raise ValueError(f"Profile with id {profile_id} not found")
+    return profile.to_dict()
+
+
+def list_slow_queries() -> list[dict]:
+    with _buffers_lock:
+        return list(reversed(_slow_queries))
+
+
+def capture_plans(fn):
+    """Marks a read-only helper: its slow statements get an EXPLAIN ANALYZE plan."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _capture_plans.set(True)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _capture_plans.reset(token)
+    return wrapper
+
+
+def _explainable(statement: str, executemany: bool) -> bool:
+    # Only plain reads: EXPLAIN ANALYZE executes the statement
+    normalized = statement.lstrip().upper()
+    return (
+        not executemany
+        and normalized.startswith("SELECT")
+        and "FOR UPDATE" not in normalized
+        and not _UNSAFE_FUNCTIONS.search(statement)
+    )
+
+
+def _capture_plan(engine, entry: dict, statement: str, parameters):
+    raw_connection = engine.raw_connection()
+    try:
+        cursor = raw_connection.cursor()
+        cursor.execute(f"SET LOCAL statement_timeout = {int(settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS)}")
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters)
+        plan = cursor.fetchone()[0]
+        entry["plan"] = json.loads(plan) if isinstance(plan, str) else plan
+        cursor.close()
+    except Exception as e:
+        entry["plan_error"] = str(e)
+    finally:
+        # Never keep anything the re-run might have done
+        raw_connection.rollback()
+        raw_connection.close()
+
+
+def instrument_engine(engine, env: str):
+    """Feeds statement timings into the active request profile and the slow-query buffer."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profiling_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - conn.info["profiling_query_start"].pop()) * 1000
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.record(env, statement, duration_ms)
+
+        if duration_ms < settings.SLOW_QUERY_THRESHOLD_MS:
+            return
+        entry = {
+            "id": next(_slow_query_ids),
+            "env": env,
+            "captured_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "duration_ms": round(duration_ms, 3),
+            "statement": statement,
+            "profile_id": profile.id if profile is not None else None,
+            "plan": None,
+        }
+        with _buffers_lock:
+            _slow_queries.append(entry)
+        if settings.SLOW_QUERY_EXPLAIN and _capture_plans.get() and _explainable(statement, executemany):
+            _explain_executor.submit(_capture_plan, engine, entry, statement, parameters)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("profiling_query_start"):
+            conn.info["profiling_query_start"].pop()
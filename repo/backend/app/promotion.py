@@ -0,0 +1,126 @@
+# app/promotion.py
+# Promotion of table data from one environment to another as a single reviewable change
+import tempfile
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from . import models, schemas, compare, drivers, cache
+
+# Key stored in PendingChange.new_values to mark a change as a promotion
+PROMOTION_KEY = "__promotion__"
+# Rows spill from memory to a temporary file above this size while being copied
+SPOOL_MAX_BYTES = 64 * 1024 * 1024
+
+
+def is_promotion(change: models.PendingChange) -> bool:
+    return bool(change.new_values) and PROMOTION_KEY in change.new_values
+
+
+def create_promotion_request(db: Session, promotion: schemas.PromotionRequest, user: models.User):
+    """
+    Computes the delta between the source and target tables and records it as one
+    pending change on the target environment. The delta is recomputed on approval.
+    """
+    target_env = db.get_env()
+    if promotion.source_env == target_env:
+        raise ValueError("Source and target environments must differ")
+
+    source, target = compare._prepare_sides(promotion.source_env, target_env, promotion.table_name)
+    keys = compare.diff_keys(source, target)
+
+    new_change = models.PendingChange(
+        table_name=promotion.table_name,
+        record_id=None,
+        old_values=None,
+        new_values={
+            PROMOTION_KEY: {
+                "source_env": promotion.source_env,
+                "delete_missing": promotion.delete_missing,
+                "summary": {
+                    "insert": len(keys["only_in_left"]),
+                    "update": len(keys["changed"]),
+                    "delete": len(keys["only_in_right"]) if promotion.delete_missing else 0,
+                },
+            }
+        },
+        submitted_by=user.username
+    )
+    db.add(new_change)
+    db.commit()
+    cache.bump_table_version(target_env, models.PendingChange.__tablename__)
+    db.refresh(new_change)
+    return new_change
+
+
+def _copy_rows_out(source: "compare.TableSide", keys: list[int], buffer):
+    """Streams the given rows out of the source environment with COPY TO."""
+    columns = ", ".join(f'"{c}"' for c in source.columns)
+    raw_connection = source.engine.raw_connection()
+    try:
+        cursor = raw_connection.cursor()
+        drivers.copy_to(
+            cursor,
+            f'SELECT {columns} FROM {source.qualified_name} WHERE "{source.pk}" = ANY(%s::bigint[])',
+            (keys,),
+            buffer
+        )
+        cursor.close()
+    finally:
+        raw_connection.close()
+
+
+def apply_promotion(db: Session, change: models.PendingChange) -> dict:
+    """
+    Applies a promotion inside the caller's transaction: the differing rows are copied
+    into a temporary staging table with COPY FROM, then merged with one INSERT ... ON
+    CONFLICT and (optionally) one DELETE. Returns a summary of what was applied.
+    """
+    options = change.new_values[PROMOTION_KEY]
+    target_env = db.get_env()
+    source, target = compare._prepare_sides(options["source_env"], target_env, change.table_name)
+    keys = compare.diff_keys(source, target)
+
+    to_copy = keys["only_in_left"] + keys["changed"]
+    to_delete = keys["only_in_right"] if options.get("delete_missing") else []
+    columns = ", ".join(f'"{c}"' for c in target.columns)
+    updates = ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in target.columns if c != target.pk)
+
+    if to_copy:
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as buffer:
+            _copy_rows_out(source, to_copy, buffer)
+            buffer.seek(0)
+
+            db.execute(text(
+                f"CREATE TEMP TABLE _promotion_stage ON COMMIT DROP AS "
+                f"SELECT {columns} FROM {target.qualified_name} WITH NO DATA"
+            ))
+            cursor = db.connection().connection.cursor()
+            drivers.copy_from(cursor, f"COPY _promotion_stage ({columns}) FROM STDIN", buffer)
+            cursor.close()
+
+        conflict_action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+        db.execute(text(
+            f"INSERT INTO {target.qualified_name} ({columns}) SELECT {columns} FROM _promotion_stage "
+            f'ON CONFLICT ("{target.pk}") {conflict_action}'
+        ))
+        # Explicit keys were inserted, so move any serial sequence past them
+        db.execute(text(
+            f"SELECT setval(seq, GREATEST((SELECT max(\"{target.pk}\") FROM {target.qualified_name}), 1)) "
+            f"FROM pg_get_serial_sequence(:table, :pk) AS seq WHERE seq IS NOT NULL"
+        ), {"table": f"{target_env}.{change.table_name}", "pk": target.pk})
+
+    if to_delete:
+        db.execute(
+            text(f'DELETE FROM {target.qualified_name} WHERE "{target.pk}" = ANY(CAST(:keys AS bigint[]))'),
+            {"keys": to_delete}
+        )
+
+    return {
+        "source_env": options["source_env"],
+        "inserted": len(keys["only_in_left"]),
+        "updated": len(keys["changed"]),
+        "deleted": len(to_delete),
+        "inserted_keys": keys["only_in_left"],
+        "updated_keys": keys["changed"],
+        "deleted_keys": to_delete,
+    }
@@ -0,0 +1,191 @@
+# app/saved_queries.py
+# Saved, parameterised queries built from the table-read vocabulary (projection, filters,
+# group-by/aggregates). Each query is compiled once; its results are cached briefly per
+# (query, parameters, table version), so approvals that touch the table invalidate them.
+import json
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from . import db_manager, aggregation, cache, models, schemas, profiling
+from .config import settings
+
+MAX_ROWS = 1000
+
+# (env, query_id, updated_at) -> CompiledQuery; versions replaced by an edit age out of the LRU
+_compiled = cache.ResultCache(max_entries=256)
+# The TTL bounds staleness after writes no version bump saw (other tools, missed invalidations)
+_results = cache.ResultCache(max_entries=512, ttl_seconds=settings.TABLE_READ_CACHE_TTL_SECONDS)
+
+
+class CompiledQuery:
+    """SQL text plus the bound values fixed at save time and the run-time parameter slots."""
+
+    def __init__(self, statement, static_params: dict, placeholders: dict):
+        self.statement = statement
+        self.static_params = static_params
+        # bind parameter name -> saved-query parameter name
+        self.placeholders = placeholders
+
+    def bind(self, parameters: dict) -> dict:
+        return {**self.static_params, **{key: parameters[name] for key, name in self.placeholders.items()}}
+
+
+def _placeholder(value) -> Optional[str]:
+    if isinstance(value, str) and value.startswith(":") and len(value) > 1:
+        return value[1:]
+    return None
+
+
+def compile_query(table, definition: dict, parameters: dict) -> CompiledQuery:
+    """Validates a query definition against the table and compiles it to one SQL statement."""
+    columns = definition.get("columns")
+    filters = definition.get("filters") or []
+    group_by = definition.get("group_by") or []
+    aggregates = definition.get("aggregates") or []
+    limit = int(definition.get("limit", 100))
+    if not 1 <= limit <= MAX_ROWS:
+        raise ValueError(f"limit must be between 1 and {MAX_ROWS}")
+
+    where_clauses, params, applied = db_manager._build_filter_clauses(table, json.dumps(filters))
+    if len(applied) != len(filters):
+        raise ValueError("Every filter needs a known column, a supported operator and a value")
+    placeholders = {}
+    for key, value in list(params.items()):
+        name = _placeholder(value)
+        if name is None:
+            continue
+        if name not in parameters:
+            raise ValueError(f"Filter refers to undeclared parameter '{name}'")
+        placeholders[key] = name
+        del params[key]
+
+    if group_by or aggregates:
+        if columns:
+            raise ValueError("A query either projects columns or aggregates them, not both")
+        parsed = aggregation.parse_aggregates(",".join(aggregates) if aggregates else None)
+        aggregation._validate(table, group_by, parsed)
+        select_list = [f'"{c}"' for c in group_by] + [
+            f'{sql} AS "{alias}"' for sql, alias in (aggregation._select_expression(f, c) for f, c in parsed)
+        ]
+        order_by = [f'"{c}"' for c in group_by]
+    else:
+        select_list = [f'"{c}"' for c in db_manager._resolve_projection(table, columns)]
+        order_by = [f'"{c.name}"' for c in table.primary_key.columns]
+
+    sql = f"SELECT {', '.join(select_list)} FROM {table.schema}.\"{table.name}\""
+    if where_clauses:
+        sql += " WHERE " + " AND ".join(where_clauses)
+    if group_by:
+        sql += " GROUP BY " + ", ".join(f'"{c}"' for c in group_by)
+    if order_by:
+        sql += " ORDER BY " + ", ".join(order_by)
+    sql += " LIMIT :limit"
+    params["limit"] = limit
+    return CompiledQuery(text(sql), params, placeholders)
+
+
+def _to_dict(saved: models.SavedQuery) -> dict:
+    return {
+        "id": saved.id,
+        "name": saved.name,
+        "description": saved.description,
+        "table_name": saved.table_name,
+        "definition": saved.definition,
+        "parameters": saved.parameters,
+        "created_by": saved.created_by,
+        "created_at": saved.created_at.isoformat() if saved.created_at else None,
+    }
+
+
+def _get_saved_query(db: Session, query_id: int) -> models.SavedQuery:
+    saved = db.query(models.SavedQuery).filter(models.SavedQuery.id == query_id).first()
+    if saved is None:
+        raise LookupError(f"Saved query with id {query_id} not found")
+    return saved
+
+
+def create_saved_query(db: Session, query: schemas.SavedQueryCreate, user: models.User) -> dict:
+    if query.table_name not in db_manager.get_all_table_names(db=db):
+        raise LookupError(f"Table '{query.table_name}' not found.")
+    if db.query(models.SavedQuery).filter(models.SavedQuery.name == query.name).first():
+        raise ValueError(f"A saved query named '{query.name}' already exists")
+
+    definition = {
+        "columns": query.columns,
+        "filters": query.filters,
+        "group_by": query.group_by,
+        "aggregates": query.aggregates,
+        "limit": query.limit,
+    }
+    # Compile up front so invalid definitions are rejected when saved, not when run
+    table = db_manager._reflect_table(db.get_engine(), db.get_env(), query.table_name)
+    compile_query(table, definition, query.parameters)
+
+    saved = models.SavedQuery(
+        name=query.name,
+        description=query.description,
+        table_name=query.table_name,
+        definition=definition,
+        parameters=query.parameters,
+        created_by=user.username,
+    )
+    db.add(saved)
+    db.commit()
+    cache.bump_table_version(db.get_env(), models.SavedQuery.__tablename__)
+    db.refresh(saved)
+    return _to_dict(saved)
+
+
+def list_saved_queries(db: Session) -> list[dict]:
+    return [_to_dict(q) for q in db.query(models.SavedQuery).order_by(models.SavedQuery.name).all()]
+
+
+def delete_saved_query(db: Session, query_id: int):
+    db.delete(_get_saved_query(db, query_id))
+    db.commit()
+    cache.bump_table_version(db.get_env(), models.SavedQuery.__tablename__)
+
+
+@profiling.capture_plans
+def run_saved_query(db: Session, query_id: int, parameters: Optional[dict] = None) -> dict:
+    """Runs a saved query with bound parameters, serving repeated runs from the cache."""
+    saved = _get_saved_query(db, query_id)
+    env = db.get_env()
+    parameters = parameters or {}
+    unknown = set(parameters) - set(saved.parameters)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+    bound = {**saved.parameters, **parameters}
+    missing = [name for name, value in bound.items() if value is None]
+    if missing:
+        raise ValueError(f"Missing required parameters: {', '.join(missing)}")
+
+    compiled_key = (env, saved.id, saved.updated_at)
+    compiled = _compiled.get(compiled_key)
+    if compiled is None:
+        table = db_manager._reflect_table(db.get_engine(), env, saved.table_name)
+        compiled = compile_query(table, saved.definition, saved.parameters)
+        _compiled.set(compiled_key, compiled)
+
+    version = cache.get_table_version(env, saved.table_name)
+    key = (env, saved.id, saved.updated_at, json.dumps(bound, sort_keys=True, default=str), version)
+    result = _results.get(key)
+    if result is not None:
+        return {**result, "cached": True}
+
+    with db.get_engine().connect() as connection:
+        rows = connection.execute(compiled.statement, compiled.bind(bound)).mappings()
+        rows = [db_manager._make_record_serializable(dict(row)) for row in rows]
+
+    result = {
+        "id": saved.id,
+        "name": saved.name,
+        "table": saved.table_name,
+        "parameters": bound,
+        "rows": rows,
+        "table_version": version,
+    }
+    if cache.cacheable(db, saved.table_name):
+        _results.set(key, result)
+    return {**result, "cached": False}
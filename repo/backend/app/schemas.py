@@ -15,6 +15,45 @@ class ChangeRequest(BaseModel):
     old_values: Optional[dict[str, Any]] = None
     new_values: dict[str, Any]
 
+# Schema for approving a stack of pending changes to the same record
+class ChangeStackApproval(BaseModel):
+    change_ids: list[int]
+
+# Schema for the request body of the bulk delete endpoint: either ids or filters
+class BulkDeleteRequest(BaseModel):
+    ids: Optional[list[int]] = None
+    filters: Optional[list[dict[str, Any]]] = None
+    chunk_size: int = 1000
+
+# Schema for the request body of the /promotions endpoint
+class PromotionRequest(BaseModel):
+    table_name: str
+    source_env: str
+    delete_missing: bool = False
+
+# Schema for the request body of the index creation endpoint
+class IndexCreateRequest(BaseModel):
+    table_name: str
+    column: str
+    method: str = "btree"
+    confirm: bool = False
+
+# Schemas for saved (predefined) queries. Filter values written as ":name" are bound
+# to the query parameter "name" at run time.
+class SavedQueryCreate(BaseModel):
+    name: str
+    description: Optional[str] = None
+    table_name: str
+    columns: Optional[list[str]] = None
+    filters: list[dict[str, Any]] = []
+    group_by: list[str] = []
+    aggregates: list[str] = []
+    limit: int = 100
+    parameters: dict[str, Any] = {}
+
+class SavedQueryRun(BaseModel):
+    parameters: dict[str, Any] = {}
+
 # Token Schemas
 class Token(BaseModel):
     access_token: str
@@ -0,0 +1,190 @@
+# app/search.py
+# Ranked substring search across a table's text columns, backed by pg_trgm GIN indexes
+# on the columns listed in SEARCH_INDEX_COLUMNS (built at bootstrap or by an admin)
+import logging
+import time
+from typing import Optional
+from sqlalchemy import String, inspect, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from . import db_manager, index_advisor, profiling
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Text columns that must never be searchable
+EXCLUDED_COLUMNS = {"password_hash"}
+# How long a worker trusts what it last read about a table's trigram indexes
+INDEX_STATE_TTL_SECONDS = 60.0
+
+# (env, table_name) -> (checked_at, pg_trgm installed, columns with a valid trigram index)
+_index_state: dict = {}
+
+# pg_trgm availability plus the columns that lead a valid (not half-built) trigram index
+_INDEX_STATE_SQL = """
+    SELECT
+        EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') AS trgm,
+        ARRAY(
+            SELECT a.attname
+            FROM pg_index i
+            JOIN pg_class t ON t.oid = i.indrelid
+            JOIN pg_namespace n ON n.oid = t.relnamespace
+            JOIN pg_opclass opc ON opc.oid = i.indclass[0]
+            JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = i.indkey[0]
+            WHERE n.nspname = :schema AND t.relname = :table
+              AND i.indisvalid AND opc.opcname LIKE '%trgm%'
+        ) AS columns
+"""
+
+
+def text_columns(table) -> list[str]:
+    """Names of the table's text (VARCHAR/TEXT) columns that can be searched."""
+    return [
+        c.name for c in table.columns
+        if isinstance(c.type, String) and c.name not in EXCLUDED_COLUMNS
+    ]
+
+
+def configured_columns() -> dict[str, list[str]]:
+    """SEARCH_INDEX_COLUMNS ("table.column,...") as {table_name: [columns]}."""
+    columns: dict = {}
+    for entry in settings.SEARCH_INDEX_COLUMNS.split(","):
+        table_name, _, column = entry.strip().partition(".")
+        if table_name and column:
+            columns.setdefault(table_name, []).append(column)
+    return columns
+
+
+def build_search_indexes(engine, env: str) -> dict:
+    """
+    Creates pg_trgm and a trigram GIN index for every configured column of the
+    environment (run by bootstrap and the admin endpoint, never by a search). Indexes are
+    built CONCURRENTLY so writes are not blocked; one left INVALID by an earlier failed
+    build is dropped and rebuilt, since IF NOT EXISTS would keep it forever.
+    """
+    result = {"env": env, "available": True, "created": [], "skipped": []}
+    existing = set(inspect(engine).get_table_names(schema=env))
+    # CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        try:
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        except DBAPIError as e:
+            logger.warning("pg_trgm unavailable, search stays unindexed", extra={"fields": {"env": env, "error": str(e)}})
+            return {**result, "available": False}
+
+        for table_name, columns in configured_columns().items():
+            if table_name not in existing:
+                result["skipped"].extend(f"{table_name}.{c}" for c in columns)
+                continue
+            known = {c["name"] for c in inspect(engine).get_columns(table_name, schema=env)}
+            for column in columns:
+                if column not in known or column in EXCLUDED_COLUMNS:
+                    result["skipped"].append(f"{table_name}.{column}")
+                    continue
+                name = index_advisor.index_name(table_name, column, "trgm")
+                invalid = connection.execute(text("""
+                    SELECT 1 FROM pg_index i
+                    JOIN pg_class c ON c.oid = i.indexrelid
+                    JOIN pg_namespace n ON n.oid = c.relnamespace
+                    WHERE n.nspname = :schema AND c.relname = :name AND NOT i.indisvalid
+                """), {"schema": env, "name": name}).first()
+                if invalid:
+                    connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {env}."{name}"'))
+                connection.execute(text(index_advisor.index_ddl(env, table_name, column, "trgm")))
+                result["created"].append(f"{table_name}.{column}")
+    for key in [k for k in _index_state if k[0] == env]:
+        _index_state.pop(key, None)
+    return result
+
+
+def _index_status(engine, env: str, table_name: str) -> tuple[bool, set]:
+    """(pg_trgm installed, columns with a valid trigram index), re-read every INDEX_STATE_TTL_SECONDS."""
+    key = (env, table_name)
+    cached = _index_state.get(key)
+    if cached is not None and time.monotonic() - cached[0] < INDEX_STATE_TTL_SECONDS:
+        return cached[1], cached[2]
+    with engine.connect() as connection:
+        row = connection.execute(text(_INDEX_STATE_SQL), {"schema": env, "table": table_name}).one()
+    _index_state[key] = (time.monotonic(), row.trgm, set(row.columns))
+    return row.trgm, set(row.columns)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@profiling.capture_plans
+def search_table(
+    db: Session,
+    table_name: str,
+    q: str,
+    limit: int = 20,
+    offset: int = 0,
+    columns: Optional[list[str]] = None
+) -> dict:
+    """Searches the table's text columns for `q`, best matches first."""
+    if not q or not q.strip():
+        raise ValueError("Search query must not be empty")
+
+    engine = db.get_engine()
+    env = db.get_env()
+    table = db_manager._reflect_table(engine, env, table_name)
+    searchable = text_columns(table)
+    if columns:
+        unknown = [c for c in columns if c not in searchable]
+        if unknown:
+            raise ValueError(f"Columns are not searchable text columns: {', '.join(unknown)}")
+        searchable = columns
+    if not searchable:
+        raise ValueError(f"Table '{table_name}' has no searchable text columns")
+
+    # Ranking depends only on whether pg_trgm is installed, so every worker orders
+    # results the same way; `indexed` reports whether each searched column has an index
+    trgm, indexed_columns = _index_status(engine, env, table_name)
+    indexed = trgm and set(searchable) <= indexed_columns
+    pk_columns = [c.name for c in table.primary_key.columns]
+
+    quoted = [f'"{c}"' for c in searchable]
+    where = " OR ".join(f"{c} ILIKE :pattern" for c in quoted)
+    if trgm:
+        rank = "greatest(" + ", ".join(f"word_similarity(:q, {c})" for c in quoted) + ")"
+    else:
+        # Without pg_trgm, rank exact matches over prefixes over other substring matches
+        rank = "greatest(" + ", ".join(
+            f"CASE WHEN lower({c}) = lower(:q) THEN 1.0 WHEN {c} ILIKE :prefix THEN 0.75 "
+            f"WHEN {c} ILIKE :pattern THEN 0.5 ELSE 0 END"
+            for c in quoted
+        ) + ")"
+    order_by = ", ".join(["_rank DESC"] + [f'"{c}"' for c in pk_columns])
+
+    select_list = ", ".join(f'"{c.name}"' for c in table.columns if c.name not in EXCLUDED_COLUMNS)
+    query = (
+        f"SELECT {select_list}, {rank} AS _rank FROM {env}.\"{table_name}\" "
+        f"WHERE {where} ORDER BY {order_by} LIMIT :limit OFFSET :offset"
+    )
+    escaped = _escape_like(q.strip())
+    params = {
+        "q": q.strip(),
+        "pattern": f"%{escaped}%",
+        "prefix": f"{escaped}%",
+        "limit": limit,
+        "offset": offset,
+    }
+    with engine.connect() as connection:
+        rows = [dict(row) for row in connection.execute(text(query), params).mappings()]
+
+    results = []
+    for row in rows:
+        rank_value = row.pop("_rank")
+        results.append({"rank": float(rank_value or 0), "record": db_manager._make_record_serializable(row)})
+
+    return {
+        "table": table_name,
+        "query": q,
+        "columns": searchable,
+        "indexed": indexed,
+        "limit": limit,
+        "offset": offset,
+        "results": results,
+    }
@@ -0,0 +1,341 @@
+# app/seeding.py
+# Declarative, large-scale seeding engine that loads synthetic rows with COPY
+#
+# A spec lists tables, the total number of rows each should hold and a generator per
+# column, e.g.
+#
+#   {"tables": [{"table": "products", "rows": 5000000, "columns": {
+#       "name": {"type": "sequence", "format": "Product {i}"},
+#       "price": {"type": "decimal", "min": 1, "max": 2000, "scale": 2},
+#       "stock_quantity": {"type": "int", "min": 0, "max": 1000},
+#       "category": {"type": "choice", "values": ["Electronics", "Office"]},
+#       "description": {"type": "text", "words": 12}}}]}
+#
+# Seeding is idempotent: rows are generated deterministically from their index, only the
+# rows missing to reach the target count are loaded, and new indexes continue after the
+# highest one already in the table (read back from its "sequence" columns), so re-running
+# is a no-op and deleted rows never cause generated values to be reused.
+#
+# The API does not seed in the web worker: start_seed_job runs this module's CLI in a
+# separate process and get_seed_job reports on it.
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import NullPool
+
+from . import db_manager, auth, cache, drivers
+
+# Rows per COPY task; tasks for all environments run in parallel worker processes
+CHUNK_ROWS = 250_000
+# Rows formatted per buffer handed to COPY
+BATCH_ROWS = 10_000
+# Spec, log and result of seed jobs started through the API (shared by all workers on a host)
+SEED_JOB_DIR = os.path.join(tempfile.gettempdir(), "sagole-seed-jobs")
+# Directory the CLI is started from, so that `app` is importable
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PRIME = 2_654_435_761
+_WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore "
+    "et dolore magna aliqua enim ad minim veniam quis nostrud exercitation ullamco laboris nisi aliquip"
+).split()
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+GENERATOR_TYPES = ("sequence", "int", "decimal", "choice", "text", "bool", "constant", "password_hash")
+
+
+def _spread(i: int, salt: int, modulus: int) -> int:
+    """Cheap deterministic scatter of a row index into [0, modulus)."""
+    return ((i * _PRIME) ^ salt) % modulus
+
+
+def _make_generator(column: str, spec: dict):
+    """Builds a function of the row index that returns the column's COPY text value."""
+    kind = spec.get("type")
+    salt = zlib.crc32(column.encode())
+
+    if kind == "sequence":
+        fmt = spec.get("format", "{i}")
+        return lambda i: fmt.format(i=i).translate(_COPY_ESCAPES)
+    if kind == "int":
+        low, high = int(spec.get("min", 0)), int(spec.get("max", 1_000_000))
+        return lambda i: str(low + _spread(i, salt, high - low + 1))
+    if kind == "decimal":
+        scale = int(spec.get("scale", 2))
+        factor = 10 ** scale
+        low, high = int(spec.get("min", 0) * factor), int(spec.get("max", 1000) * factor)
+        return lambda i: f"{(low + _spread(i, salt, high - low + 1)) / factor:.{scale}f}"
+    if kind == "choice":
+        values = [str(v).translate(_COPY_ESCAPES) for v in spec["values"]]
+        return lambda i: values[_spread(i, salt, len(values))]
+    if kind == "text":
+        words = int(spec.get("words", 8))
+        return lambda i: " ".join(_WORDS[_spread(i + w, salt, len(_WORDS))] for w in range(words))
+    if kind == "bool":
+        threshold = int(float(spec.get("true_ratio", 0.5)) * 1000)
+        return lambda i: "t" if _spread(i, salt, 1000) < threshold else "f"
+    if kind == "constant":
+        value = "\\N" if spec.get("value") is None else str(spec["value"]).translate(_COPY_ESCAPES)
+        return lambda i: value
+    if kind == "password_hash":
+        # Resolved by _resolve_password_hashes before the spec reaches a worker
+        hashes = spec["hashes"]
+        return lambda i: hashes[i % len(hashes)]
+    raise ValueError(f"Unknown generator type '{kind}' for column '{column}'")
+
+
+def _resolve_password_hashes(columns: dict) -> dict:
+    """Replaces password_hash generators with a small pool of precomputed bcrypt hashes."""
+    resolved = {}
+    for column, spec in columns.items():
+        if spec.get("type") == "password_hash" and "hashes" not in spec:
+            password = spec.get("password", "password{k}")
+            pool_size = int(spec.get("pool_size", 8))
+            spec = {**spec, "hashes": [auth.get_password_hash(password.format(k=k)) for k in range(pool_size)]}
+        resolved[column] = spec
+    return resolved
+
+
+class _CopyStream:
+    """File-like object that formats rows lazily so COPY never needs the whole load in memory."""
+
+    def __init__(self, generators: list, start: int, stop: int):
+        self._generators = generators
+        self._next_index = start
+        self._stop = stop
+        self._buffer = b""
+
+    def _fill(self):
+        end = min(self._next_index + BATCH_ROWS, self._stop)
+        generators = self._generators
+        lines = ["\t".join(g(i) for g in generators) for i in range(self._next_index, end)]
+        self._next_index = end
+        self._buffer += ("\n".join(lines) + "\n").encode()
+
+    def read(self, size: int = -1) -> bytes:
+        while (size < 0 or len(self._buffer) < size) and self._next_index < self._stop:
+            self._fill()
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+def _copy_chunk(db_url: str, env: str, table: str, columns: dict, start: int, stop: int) -> int:
+    """Worker task: loads rows [start, stop) of one table with a single COPY."""
+    engine = create_engine(drivers.engine_url(db_url), poolclass=NullPool)
+    generators = [_make_generator(column, spec) for column, spec in columns.items()]
+    column_list = ", ".join(f'"{c}"' for c in columns)
+    raw_connection = engine.raw_connection()
+    try:
+        cursor = raw_connection.cursor()
+        drivers.copy_from(
+            cursor,
+            f'COPY {env}."{table}" ({column_list}) FROM STDIN',
+            _CopyStream(generators, start, stop),
+            size=1 << 20,
+        )
+        raw_connection.commit()
+        cursor.close()
+    finally:
+        raw_connection.close()
+        engine.dispose()
+    return stop - start
+
+
+def validate_spec(spec: dict):
+    if not isinstance(spec.get("tables"), list) or not spec["tables"]:
+        raise ValueError("Seed spec must contain a non-empty 'tables' list")
+    for table_spec in spec["tables"]:
+        for key in ("table", "rows", "columns"):
+            if key not in table_spec:
+                raise ValueError(f"Every table in the seed spec needs '{key}'")
+        for column, column_spec in table_spec["columns"].items():
+            if column_spec.get("type") not in GENERATOR_TYPES:
+                raise ValueError(f"Unknown generator type '{column_spec.get('type')}' for column '{column}'")
+
+
+def _sequence_pattern(fmt: str) -> Optional[str]:
+    """Postgres regex that captures the index from values of a sequence format like "user_{i}"."""
+    fields = [(literal, field) for literal, field, _, _ in string.Formatter().parse(fmt)]
+    placeholders = [position for position, (_, field) in enumerate(fields) if field is not None]
+    if len(placeholders) != 1 or fields[placeholders[0]][1] != "i":
+        return None
+    position = placeholders[0]
+    prefix = "".join(literal for literal, _ in fields[:position + 1])
+    suffix = "".join(literal for literal, _ in fields[position + 1:])
+    return f"^{re.escape(prefix)}([0-9]+){re.escape(suffix)}$"
+
+
+def _highest_index(connection, env: str, table: str, columns: dict) -> int:
+    """The highest row index already generated into the table (0 if none can be found)."""
+    expressions = []
+    params = {}
+    for position, (column, column_spec) in enumerate(columns.items()):
+        if column_spec.get("type") != "sequence":
+            continue
+        pattern = _sequence_pattern(column_spec.get("format", "{i}"))
+        if pattern is None:
+            continue
+        params[f"pattern_{position}"] = pattern
+        expressions.append(f'max(substring("{column}"::text from :pattern_{position})::numeric)')
+    if not expressions:
+        return 0
+    value = connection.execute(
+        text(f'SELECT greatest({", ".join(expressions)}) FROM {env}."{table}"'), params
+    ).scalar()
+    return int(value or 0)
+
+
+def _plan_env(env: str, spec: dict) -> list[tuple]:
+    """Returns the COPY tasks needed to bring each table in `env` up to its target row count."""
+    engine = db_manager.get_engine(env)
+    existing_tables = set(inspect(engine).get_table_names(schema=env))
+    tasks = []
+    with engine.connect() as connection:
+        for table_spec in spec["tables"]:
+            table = table_spec["table"]
+            if table not in existing_tables:
+                raise ValueError(f"Table '{table}' not found in environment '{env}'")
+            known_columns = {c["name"] for c in inspect(engine).get_columns(table, schema=env)}
+            unknown = set(table_spec["columns"]) - known_columns
+            if unknown:
+                raise ValueError(f"Unknown columns for table '{table}': {', '.join(sorted(unknown))}")
+
+            current = connection.execute(text(f'SELECT count(*) FROM {env}."{table}"')).scalar()
+            missing = int(table_spec["rows"]) - current
+            if missing <= 0:
+                continue
+            # Continue after the highest index in use: after deletes the count is lower than
+            # that index, and regenerating an existing index would hit unique constraints
+            first = max(current, _highest_index(connection, env, table, table_spec["columns"])) + 1
+            for start in range(first, first + missing, CHUNK_ROWS):
+                stop = min(start + CHUNK_ROWS, first + missing)
+                tasks.append((db_manager.DATABASE_URLS[env], env, table, table_spec["columns"], start, stop))
+    return tasks
+
+
+def seed_from_spec(spec: dict, envs: list[str], workers: Optional[int] = None) -> dict:
+    """Seeds every listed environment from a spec, loading chunks in parallel worker processes."""
+    validate_spec(spec)
+    for env in envs:
+        if env not in db_manager.DATABASE_URLS:
+            raise ValueError(f"Environment '{env}' not found in DATABASE_URLS")
+
+    tasks = [task for env in envs for task in _plan_env(env, spec)]
+    # Precompute the password hash pools once, and only for tables that will actually be loaded
+    resolved_columns = {
+        t["table"]: _resolve_password_hashes(t["columns"])
+        for t in spec["tables"] if any(task[2] == t["table"] for task in tasks)
+    }
+    tasks = [(url, env, table, resolved_columns[table], start, stop) for url, env, table, _, start, stop in tasks]
+
+    started = time.perf_counter()
+    loaded: dict = {env: {} for env in envs}
+    if tasks:
+        # Spawned (not forked) workers so pooled connections and threads of a running server aren't inherited
+        with ProcessPoolExecutor(
+            max_workers=workers or min(len(tasks), os.cpu_count() or 1),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            futures = [(task, executor.submit(_copy_chunk, *task)) for task in tasks]
+            for task, future in futures:
+                env, table = task[1], task[2]
+                loaded[env][table] = loaded[env].get(table, 0) + future.result()
+
+    for env in envs:
+        engine = db_manager.get_engine(env)
+        with engine.begin() as connection:
+            for table in loaded[env]:
+                connection.execute(text(f'ANALYZE {env}."{table}"'))
+                cache.bump_table_version(env, table)
+
+    return {"rows_loaded": loaded, "seconds": round(time.perf_counter() - started, 3)}
+
+
+def _job_path(job_id: str, name: str) -> str:
+    return os.path.join(SEED_JOB_DIR, f"{job_id}.{name}")
+
+
+def start_seed_job(spec: dict, envs: list[str]) -> dict:
+    """
+    Validates the spec and runs the seeder CLI for it in a separate process, so the COPY
+    worker processes are never started from a web worker. Returns the job id to poll
+    with get_seed_job.
+    """
+    validate_spec(spec)
+    for env in envs:
+        if env not in db_manager.DATABASE_URLS:
+            raise ValueError(f"Environment '{env}' not found in DATABASE_URLS")
+    os.makedirs(SEED_JOB_DIR, exist_ok=True)
+    job_id = uuid.uuid4().hex
+    with open(_job_path(job_id, "spec.json"), "w") as f:
+        json.dump(spec, f)
+    command = [sys.executable, "-m", "app.seeding", _job_path(job_id, "spec.json"),
+               "--result", _job_path(job_id, "result.json")]
+    for env in envs:
+        command += ["--env", env]
+    with open(_job_path(job_id, "log"), "wb") as log:
+        # Its own session: the job outlives a recycled or restarted web worker
+        subprocess.Popen(command, cwd=_BACKEND_DIR, stdout=log, stderr=subprocess.STDOUT,
+                         stdin=subprocess.DEVNULL, start_new_session=True)
+    return {"job_id": job_id, "status": "running", "envs": envs}
+
+
+def get_seed_job(job_id: str) -> dict:
+    """Status of a seed job: "running", "finished" (with its result) or "failed" (with the error)."""
+    if not re.fullmatch(r"[0-9a-f]{32}", job_id) or not os.path.exists(_job_path(job_id, "spec.json")):
+        raise LookupError(f"Seed job '{job_id}' not found")
+    try:
+        with open(_job_path(job_id, "result.json")) as f:
+            result = json.load(f)
+    except FileNotFoundError:
+        return {"job_id": job_id, "status": "running"}
+    if "error" in result:
+        return {"job_id": job_id, "status": "failed", "error": result["error"]}
+    return {"job_id": job_id, "status": "finished", "result": result}
+
+
+def _write_result(path: str, result: dict):
+    # Written to a temporary name and renamed, so a reader never sees half a file
+    with open(path + ".tmp", "w") as f:
+        json.dump(result, f)
+    os.replace(path + ".tmp", path)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.seeding", description="Seed environments from a spec file.")
+    parser.add_argument("spec", help="Path to a JSON seed spec")
+    parser.add_argument("--env", action="append", dest="envs", help="Environment to seed (repeatable, default: all)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--result", help="Also write the result (or the error) as JSON to this file")
+    args = parser.parse_args(argv)
+
+    with open(args.spec) as f:
+        spec = json.load(f)
+    try:
+        result = seed_from_spec(spec, args.envs or list(db_manager.DATABASE_URLS), workers=args.workers)
+    except Exception as e:
+        if args.result:
+            _write_result(args.result, {"error": str(e)})
+        raise
+    if args.result:
+        _write_result(args.result, result)
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
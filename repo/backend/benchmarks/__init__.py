@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+# Reproducible load and benchmark suite for the admin API
@@ -0,0 +1,93 @@
+# benchmarks/__main__.py
+# Command line entry point: python -m benchmarks --help
+import argparse
+import datetime
+import json
+import platform
+import sys
+
+from app import drivers
+from app.config import settings
+
+from . import datagen, report, runner, workloads
+
+
+def _client_factory(base_url: str | None):
+    if base_url:
+        import httpx
+        return lambda: httpx.Client(base_url=base_url, timeout=120)
+
+    # Drive the real FastAPI app in-process (startup seeding is not run)
+    from fastapi.testclient import TestClient
+    from app.main import app
+    return lambda: TestClient(app)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the admin API.")
+    parser.add_argument("--env", default="dev", help="Environment to run against (default: dev)")
+    parser.add_argument("--rows", type=int, default=10_000, help="Size of the synthetic products table")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent clients per workload")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for every workload's iteration count")
+    parser.add_argument("--workloads", help="Comma-separated subset of workloads to run")
+    parser.add_argument("--base-url", help="Benchmark a running server instead of the in-process app")
+    parser.add_argument(
+        "--driver", choices=sorted(drivers.DRIVERS),
+        help="Database driver for the in-process app and data generation (default: DB_DRIVER)"
+    )
+    parser.add_argument("--skip-generate", action="store_true", help="Do not create or top up synthetic data")
+    parser.add_argument("--output", help="Write the JSON results to this file (default: stdout)")
+    parser.add_argument("--baseline", help="Compare against a previous results file")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed regression as a fraction (default: 0.15)")
+    args = parser.parse_args(argv)
+
+    selected = args.workloads.split(",") if args.workloads else list(workloads.WORKLOADS)
+    unknown = [name for name in selected if name not in workloads.WORKLOADS]
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(unknown)}")
+
+    if args.driver:
+        # Engines are created on first use, so this applies to every connection made below
+        settings.DB_DRIVER = args.driver
+
+    if not args.skip_generate:
+        print(f"Preparing {args.rows} rows in '{args.env}'...", file=sys.stderr)
+        datagen.prepare(args.env, args.rows)
+
+    make_client = _client_factory(args.base_url)
+    ctx = workloads.Context(args.env, args.rows, workloads.login(make_client(), args.env))
+
+    results = {
+        "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "env": args.env,
+        "driver": settings.DB_DRIVER if not args.base_url else None,
+        "rows": args.rows,
+        "concurrency": args.concurrency,
+        "workloads": {},
+    }
+    for name in selected:
+        fn, iterations = workloads.WORKLOADS[name]
+        iterations = max(int(iterations * args.scale), 1)
+        print(f"Running {name} ({iterations} iterations)...", file=sys.stderr)
+        results["workloads"][name] = runner.run_workload(make_client, fn, ctx, iterations, args.concurrency)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        results["regressions"] = report.compare_to_baseline(results, baseline, args.tolerance)
+        if results["regressions"]:
+            exit_code = 1
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+# benchmarks/datagen.py
+# Synthetic data generation for benchmark runs against a local Postgres
+from sqlalchemy import text
+
+from app import db_manager, auth
+
+BENCH_USERNAME = "bench_admin"
+BENCH_PASSWORD = "bench123"
+CATEGORIES = ["Electronics", "Kitchenware", "Furniture", "Peripherals", "Stationery", "Lighting", "Audio", "Storage"]
+
+
+def ensure_bench_admin(env: str):
+    """Creates the admin account the benchmark logs in with, if it does not exist yet."""
+    engine = db_manager.get_engine(env)
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                f"INSERT INTO {env}.users (username, email, full_name, password_hash, role, is_active) "
+                "SELECT :username, :email, 'Benchmark Admin', :password_hash, 'admin', true "
+                f"WHERE NOT EXISTS (SELECT 1 FROM {env}.users WHERE username = :username)"
+            ),
+            {
+                "username": BENCH_USERNAME,
+                "email": f"{BENCH_USERNAME}@example.com",
+                "password_hash": auth.get_password_hash(BENCH_PASSWORD),
+            },
+        )
+
+
+def ensure_products(env: str, rows: int) -> int:
+    """
+    Tops the products table up to the requested number of rows with deterministic
+    synthetic data generated inside Postgres. Returns the number of rows inserted.
+    """
+    engine = db_manager.get_engine(env)
+    with engine.begin() as connection:
+        existing = connection.execute(text(f"SELECT count(*) FROM {env}.products")).scalar()
+        missing = rows - existing
+        if missing <= 0:
+            return 0
+        connection.execute(
+            text(
+                f"INSERT INTO {env}.products (name, description, price, stock_quantity, category) "
+                "SELECT 'Bench Product ' || g, repeat('Synthetic benchmark description. ', (1 + g % 8)::int), "
+                "round((1 + (g * 7919) % 200000 / 100.0)::numeric, 2), ((g * 31) % 1000)::int, "
+                "(CAST(:categories AS text[]))[1 + g % cardinality(CAST(:categories AS text[]))] "
+                "FROM generate_series(CAST(:start AS bigint), CAST(:stop AS bigint)) AS g"
+            ),
+            {"categories": CATEGORIES, "start": existing + 1, "stop": rows},
+        )
+        connection.execute(text(f"ANALYZE {env}.products"))
+    return missing
+
+
+def prepare(env: str, rows: int) -> dict:
+    ensure_bench_admin(env)
+    inserted = ensure_products(env, rows)
+    return {"env": env, "rows": rows, "inserted": inserted}
@@ -0,0 +1,23 @@
+# benchmarks/report.py
+# Baseline comparison of benchmark results
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list[dict]:
+    """
+    Flags workloads whose p95 latency grew, or whose throughput dropped, by more than
+    `tolerance` (a fraction, e.g. 0.15) relative to the baseline run.
+    """
+    regressions = []
+    for name, current in results["workloads"].items():
+        previous = baseline.get("workloads", {}).get(name)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append({
+                "workload": name, "metric": "p95_ms",
+                "baseline": previous["p95_ms"], "current": current["p95_ms"],
+            })
+        if previous["throughput_rps"] and current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append({
+                "workload": name, "metric": "throughput_rps",
+                "baseline": previous["throughput_rps"], "current": current["throughput_rps"],
+            })
+    return regressions
@@ -0,0 +1,58 @@
+# benchmarks/runner.py
+# Runs workloads concurrently and summarises latency percentiles and throughput
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+def run_workload(make_client, fn, ctx, iterations: int, concurrency: int) -> dict:
+    """Runs `fn` `iterations` times spread over `concurrency` threads, one client per thread."""
+    latencies: list[float] = []
+    errors: list[str] = []
+    lock = threading.Lock()
+    remaining = iter(range(iterations))
+
+    def worker():
+        client = make_client()
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            start = time.perf_counter()
+            try:
+                fn(client, ctx)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    wall_time = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "wall_time_s": round(wall_time, 4),
+        "throughput_rps": round(len(latencies) / wall_time, 2) if wall_time else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
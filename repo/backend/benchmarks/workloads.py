@@ -0,0 +1,103 @@
+# benchmarks/workloads.py
+# The API workloads a benchmark run exercises; each one issues a single logical operation
+import json
+import random
+
+from . import datagen
+
+
+class Context:
+    """Shared state for a run: target environment, auth headers and table size."""
+
+    def __init__(self, env: str, rows: int, headers: dict):
+        self.env = env
+        self.rows = rows
+        self.headers = headers
+        self.latest_snapshot_id = None
+
+
+def login(client, env: str) -> dict:
+    response = client.post(
+        f"/api/v1/{env}/token",
+        data={"username": datagen.BENCH_USERNAME, "password": datagen.BENCH_PASSWORD},
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _check(response):
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.method} {response.request.url} -> {response.status_code}: {response.text[:200]}")
+    return response
+
+
+def browse_first_page(client, ctx: Context):
+    _check(client.get(f"/api/v1/{ctx.env}/tables/products", params={"limit": 20, "offset": 0}))
+
+
+def browse_middle_page(client, ctx: Context):
+    _check(client.get(f"/api/v1/{ctx.env}/tables/products", params={"limit": 20, "offset": ctx.rows // 2}))
+
+
+def browse_last_page(client, ctx: Context):
+    _check(client.get(f"/api/v1/{ctx.env}/tables/products", params={"limit": 20, "offset": max(ctx.rows - 20, 0)}))
+
+
+def filtered_equality(client, ctx: Context):
+    filters = [{"column": "category", "operator": "=", "value": random.choice(datagen.CATEGORIES)}]
+    _check(client.get(f"/api/v1/{ctx.env}/tables/products", params={"limit": 20, "filters": json.dumps(filters)}))
+
+
+def filtered_range(client, ctx: Context):
+    low = random.randint(1, 1500)
+    filters = [
+        {"column": "price", "operator": ">=", "value": low},
+        {"column": "price", "operator": "<", "value": low + 50},
+    ]
+    _check(client.get(f"/api/v1/{ctx.env}/tables/products", params={"limit": 20, "filters": json.dumps(filters)}))
+
+
+def pending_list(client, ctx: Context):
+    _check(client.get(f"/api/v1/{ctx.env}/changes", headers=ctx.headers))
+
+
+def approve_with_snapshot(client, ctx: Context):
+    record_id = random.randint(1, max(ctx.rows, 1))
+    change = _check(client.post(
+        f"/api/v1/{ctx.env}/changes",
+        json={"table_name": "products", "record_id": record_id, "new_values": {"stock_quantity": random.randint(0, 999)}},
+        headers=ctx.headers,
+    )).json()
+    _check(client.post(f"/api/v1/{ctx.env}/changes/{change['id']}/approve", headers=ctx.headers))
+
+
+def snapshot_list(client, ctx: Context):
+    snapshots = _check(client.get(f"/api/v1/{ctx.env}/tables/products/snapshots")).json()["snapshots"]
+    if snapshots:
+        ctx.latest_snapshot_id = snapshots[0]["id"]
+
+
+def snapshot_read(client, ctx: Context):
+    if ctx.latest_snapshot_id is None:
+        snapshot_list(client, ctx)
+    if ctx.latest_snapshot_id is not None:
+        _check(client.get(f"/api/v1/{ctx.env}/snapshots/{ctx.latest_snapshot_id}"))
+
+
+def login_burst(client, ctx: Context):
+    login(client, ctx.env)
+
+
+# Name -> (function, default iteration count). Approvals snapshot the whole table, so they run fewer times.
+WORKLOADS = {
+    "browse_first_page": (browse_first_page, 200),
+    "browse_middle_page": (browse_middle_page, 100),
+    "browse_last_page": (browse_last_page, 100),
+    "filtered_equality": (filtered_equality, 100),
+    "filtered_range": (filtered_range, 100),
+    "pending_list": (pending_list, 100),
+    "approve_with_snapshot": (approve_with_snapshot, 10),
+    "snapshot_list": (snapshot_list, 50),
+    "snapshot_read": (snapshot_read, 10),
+    "login_burst": (login_burst, 50),
+}
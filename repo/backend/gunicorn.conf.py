@@ -0,0 +1,29 @@
+# gunicorn.conf.py
+# Multi-worker deployment: one uvicorn worker process per core
+#
+#   gunicorn -c gunicorn.conf.py app.main:app
+#
+# Each worker runs the startup bootstrap (serialised per environment by a Postgres
+# advisory lock) and listens for cache invalidations published by the other workers.
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Workers must not share the connection pools, threads or listener connections created
+# while the app is imported, so the app is loaded in each worker rather than the master
+preload_app = False
+
+# Snapshot reads and promotions can run long; bulk seeding belongs in the CLI, not here
+timeout = int(os.getenv("WORKER_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then to bound memory held by in-process caches
+max_requests = int(os.getenv("MAX_REQUESTS", 10000))
+max_requests_jitter = 1000
+
+accesslog = "-"
+errorlog = "-"
@@ -0,0 +1,82 @@
+# tests/test_aggregation.py
+# Parsing and validating group-by aggregate requests, and when cached results go stale
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import JSON, Boolean, Column, Integer, MetaData, Numeric, String, Table
+
+from app import aggregation, cache, db_manager
+from app.config import settings
+
+products = Table(
+    "products", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("name", String),
+    Column("category", String),
+    Column("price", Numeric),
+    Column("stock_quantity", Integer),
+    Column("is_active", Boolean),
+    Column("attributes", JSON),
+)
+
+
+@pytest.mark.parametrize("spec,expected", [
+    (None, [("count", "*")]),
+    ("", [("count", "*")]),
+    ("count", [("count", "*")]),
+    ("COUNT:*", [("count", "*")]),
+    ("sum:stock_quantity, avg:price", [("sum", "stock_quantity"), ("avg", "price")]),
+    ("count_distinct:category", [("count_distinct", "category")]),
+])
+def test_parse_aggregates(spec, expected):
+    assert aggregation.parse_aggregates(spec) == expected
+
+
+@pytest.mark.parametrize("group_by,aggregates", [
+    ([], [("count", "*")]),
+    (["category", "is_active"], [("count", "*"), ("sum", "stock_quantity"), ("avg", "price")]),
+    (["category"], [("min", "name"), ("max", "price"), ("count_distinct", "is_active")]),
+])
+def test_valid_requests_pass(group_by, aggregates):
+    aggregation._validate(products, group_by, aggregates)
+
+
+@pytest.mark.parametrize("group_by,aggregates,message", [
+    (["colour"], [("count", "*")], "Unknown group-by columns"),
+    (["attributes"], [("count", "*")], "Cannot group by JSON column"),
+    ([], [("median", "price")], "must be one of"),
+    ([], [("sum", "*")], "needs a column"),
+    ([], [("sum", "weight")], "Unknown column"),
+    ([], [("avg", "name")], "needs a numeric column"),
+    ([], [("sum", "is_active")], "needs a numeric column"),
+    ([], [("max", "attributes")], "not supported"),
+    ([], [("min", "is_active")], "not supported"),
+    ([], [("count_distinct", "attributes")], "not supported"),
+])
+def test_invalid_requests_are_rejected(group_by, aggregates, message):
+    with pytest.raises(ValueError, match=message):
+        aggregation._validate(products, group_by, aggregates)
+
+
+def test_cached_results_expire():
+    assert aggregation._results.ttl_seconds == settings.TABLE_READ_CACHE_TTL_SECONDS
+
+
+def test_rejecting_a_change_invalidates_pending_change_aggregates(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_INVALIDATION", False)
+    change = SimpleNamespace(new_values={"price": 12}, status=None)
+    db = SimpleNamespace(
+        get_env=lambda: "aggregation_test",
+        query=lambda *entities: SimpleNamespace(filter=lambda *criteria: SimpleNamespace(first=lambda: change)),
+        commit=lambda: None,
+    )
+    version = cache.get_table_version("aggregation_test", "pending_changes")
+    db_manager.reject_change(db, 1, admin_user_id=1)
+    assert cache.get_table_version("aggregation_test", "pending_changes") == version + 1
+
+
+def test_bump_table_versions_bumps_each_table_once():
+    before = [cache.get_table_version("aggregation_test", t) for t in ("products", "audit_log")]
+    cache.bump_table_versions("aggregation_test", ["products", "audit_log", "products"], broadcast=False)
+    after = [cache.get_table_version("aggregation_test", t) for t in ("products", "audit_log")]
+    assert after == [v + 1 for v in before]
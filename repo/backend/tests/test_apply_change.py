@@ -0,0 +1,108 @@
+# tests/test_apply_change.py
+# Applying an approved change in one statement, guarded by the change's old values
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import JSON, Column, Integer, MetaData, Numeric, String, Table
+
+from app import db_manager
+
+products = Table(
+    "products", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("name", String),
+    Column("price", Numeric),
+    Column("attributes", JSON),
+)
+
+
+class FakeSession:
+    """Returns a fixed result for the single statement an apply runs, and keeps the statement."""
+
+    def __init__(self, result):
+        self.result = result
+        self.statements = []
+
+    def get_env(self):
+        return "dev"
+
+    def get_engine(self):
+        return None
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(scalar=lambda: self.result, one=lambda: self.result)
+
+    @property
+    def sql(self) -> str:
+        return " ".join(str(self.statements[-1]).split())
+
+    @property
+    def params(self) -> dict:
+        return {name: p.value for name, p in self.statements[-1]._bindparams.items()}
+
+
+@pytest.fixture(autouse=True)
+def reflected(monkeypatch):
+    monkeypatch.setattr(db_manager, "_reflect_table", lambda engine, env, table_name: products)
+
+
+def _change(record_id, old_values, new_values):
+    return SimpleNamespace(table_name="products", record_id=record_id, old_values=old_values, new_values=new_values)
+
+
+def test_insert_returns_the_new_row_and_records_its_id():
+    db = FakeSession({"id": 41, "name": "Lamp", "price": 12})
+    change = _change(None, None, {"name": "Lamp", "price": 12})
+
+    assert db_manager._apply_change_to_table(db, change) == (None, {"id": 41, "name": "Lamp", "price": 12})
+    assert change.record_id == 41
+    assert db.sql.startswith('INSERT INTO dev."products" AS t ("name", "price") VALUES (:new_0, :new_1) RETURNING')
+
+
+def test_update_only_checks_the_columns_it_changes():
+    before = {"id": 7, "name": "Lamp", "price": 10}
+    db = FakeSession((before, {**before, "price": 12}))
+    change = _change(7, {"name": "Lamp", "price": 10}, {"price": 12})
+
+    assert db_manager._apply_change_to_table(db, change) == (before, {**before, "price": 12})
+    assert 'SELECT * FROM dev."products" WHERE "id" = :record_id FOR UPDATE' in db.sql
+    assert 'UPDATE dev."products" AS t SET "price" = :new_0 FROM old WHERE t."id" = old."id" ' \
+           'AND old."price" IS NOT DISTINCT FROM :old_0 RETURNING t.*' in db.sql
+    assert '"name"' not in db.sql
+    assert db.params == {"new_0": 12, "old_0": 10, "record_id": 7}
+
+
+def test_json_columns_are_compared_as_jsonb():
+    before = {"id": 7, "attributes": {"colour": "red"}}
+    db = FakeSession((before, before))
+    db_manager._apply_change_to_table(db, _change(7, {"attributes": {"colour": "red"}}, {"attributes": {"colour": "blue"}}))
+    assert 'old."attributes"::jsonb IS NOT DISTINCT FROM CAST(:old_0 AS jsonb)' in db.sql
+
+
+def test_delete_checks_every_old_value_and_has_no_after_state():
+    before = {"id": 7, "name": "Lamp", "price": 10}
+    db = FakeSession((before, before))
+    assert db_manager._apply_change_to_table(db, _change(7, {"name": "Lamp", "price": 10}, {})) == (before, {})
+    assert 'DELETE FROM dev."products" AS t USING old WHERE' in db.sql
+    assert ":old_0" in db.sql and ":old_1" in db.sql
+
+
+def test_missing_row_is_a_conflict():
+    db = FakeSession((None, None))
+    with pytest.raises(db_manager.ChangeConflictError, match="Record 7 no longer exists"):
+        db_manager._apply_change_to_table(db, _change(7, {"price": 10}, {"price": 12}))
+
+
+def test_row_changed_since_submission_is_a_conflict_naming_the_stale_columns():
+    db = FakeSession(({"id": 7, "name": "Lamp", "price": 11}, None))
+    change = _change(7, {"name": "Lamp", "price": 10}, {"name": "Desk lamp", "price": 12})
+    with pytest.raises(db_manager.ChangeConflictError, match=r"modified after the change was submitted \(columns: price\)"):
+        db_manager._apply_change_to_table(db, change)
+
+
+def test_unknown_columns_are_rejected_before_running_anything():
+    db = FakeSession(None)
+    with pytest.raises(ValueError, match="Unknown columns for table 'products': colour"):
+        db_manager._apply_change_to_table(db, _change(7, {}, {"colour": "red"}))
+    assert db.statements == []
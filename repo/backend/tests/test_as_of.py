@@ -0,0 +1,120 @@
+# tests/test_as_of.py
+# The FROM source used for as-of table reads
+import datetime
+import os
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app import db_manager
+
+AS_OF = datetime.datetime(2026, 5, 1, 12, 0, tzinfo=datetime.timezone.utc)
+
+products = Table(
+    "products", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("name", String),
+)
+
+
+class FakeSession:
+    """Answers the table-wide audit lookup with `table_wide` (None when there is none)."""
+
+    def __init__(self, table_wide=None, env="dev"):
+        self.table_wide = table_wide
+        self.env = env
+
+    def get_env(self):
+        return self.env
+
+    def query(self, *entities):
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def first(self):
+        return self.table_wide
+
+
+def test_source_restores_changed_rows_and_drops_later_inserts():
+    source, params = db_manager._as_of_source(FakeSession(), products, AS_OF)
+    sql = " ".join(source.split())
+
+    assert params == {"as_of_table": "products", "as_of": AS_OF}
+    # The first audit entry after as_of holds the row as it was at as_of
+    assert "SELECT DISTINCT ON (record_id) record_id, before_state FROM dev.audit_log" in sql
+    assert "ORDER BY record_id, approved_at, id" in sql
+    assert 'SELECT * FROM dev."products" AS live' in sql
+    assert 'WHERE NOT EXISTS (SELECT 1 FROM changed c WHERE c.record_id = live."id"::text)' in sql
+    assert "NOT IN (SELECT" not in sql
+    assert 'json_populate_record(NULL::dev."products", changed.before_state)' in sql
+    # Inserted since as_of: the before state is JSON null and the row is left out
+    assert "WHERE json_typeof(changed.before_state) = 'object'" in sql
+    assert sql.endswith("AS as_of_rows")
+
+
+def test_table_wide_changes_since_as_of_are_rejected():
+    with pytest.raises(ValueError, match="table-wide operation after 2026-05-01T12:00:00"):
+        db_manager._as_of_source(FakeSession(table_wide=SimpleNamespace(id=3)), products, AS_OF)
+
+
+def test_composite_primary_keys_are_rejected():
+    order_lines = Table(
+        "order_lines", MetaData(),
+        Column("order_id", Integer, primary_key=True),
+        Column("line", Integer, primary_key=True),
+    )
+    with pytest.raises(ValueError, match="single-column primary key"):
+        db_manager._as_of_source(FakeSession(), order_lines, AS_OF)
+
+
+@pytest.fixture
+def database():
+    """A throwaway schema on the test environment's database; skipped without one."""
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_engine(url)
+    schema = f"as_of_{uuid.uuid4().hex[:8]}"
+    try:
+        with engine.begin() as connection:
+            connection.execute(text(f"CREATE SCHEMA {schema}"))
+    except OperationalError:
+        pytest.skip("test database is not reachable")
+    try:
+        with engine.begin() as connection:
+            connection.execute(text(f"CREATE TABLE {schema}.products (id integer PRIMARY KEY, name text)"))
+            connection.execute(text(
+                f"CREATE TABLE {schema}.audit_log (id serial PRIMARY KEY, table_name text, record_id text, "
+                "before_state json, approved_at timestamptz)"
+            ))
+        yield engine, schema
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        engine.dispose()
+
+
+def test_audit_entries_without_a_record_id_do_not_hide_live_rows(database):
+    engine, schema = database
+    before, after = AS_OF - datetime.timedelta(hours=1), AS_OF + datetime.timedelta(hours=1)
+    with engine.begin() as connection:
+        connection.execute(text(f"INSERT INTO {schema}.products VALUES (1, 'Lamp'), (2, 'Desk (edited)'), (3, 'Chair')"))
+        connection.execute(text(
+            f"INSERT INTO {schema}.audit_log (table_name, record_id, before_state, approved_at) VALUES "
+            "('products', '2', '{\"id\": 2, \"name\": \"Desk\"}', :after), "
+            "('products', NULL, 'null', :after), "
+            "('products', '3', 'null', :after), "
+            "('products', '1', '{\"id\": 1, \"name\": \"Old lamp\"}', :before)"
+        ), {"before": before, "after": after})
+
+    source, params = db_manager._as_of_source(FakeSession(env=schema), products, AS_OF)
+    with engine.connect() as connection:
+        rows = connection.execute(text(f"SELECT id, name FROM {source} ORDER BY id"), params).all()
+
+    # Row 1 is untouched since as_of, row 2 is restored, row 3 was inserted after as_of
+    assert [tuple(row) for row in rows] == [(1, "Lamp"), (2, "Desk")]
@@ -0,0 +1,48 @@
+# tests/test_benchmark_report.py
+# Regression detection against a saved benchmark baseline
+from benchmarks import report
+
+
+def _run(**workloads):
+    return {"workloads": {name: {"p95_ms": p95, "throughput_rps": rps} for name, (p95, rps) in workloads.items()}}
+
+
+def test_changes_within_tolerance_are_not_regressions():
+    baseline = _run(read_page=(100.0, 200.0))
+    results = _run(read_page=(114.0, 171.0))
+    assert report.compare_to_baseline(results, baseline, tolerance=0.15) == []
+
+
+def test_slower_p95_and_lower_throughput_are_flagged():
+    baseline = _run(read_page=(100.0, 200.0), search=(50.0, 400.0))
+    results = _run(read_page=(130.0, 200.0), search=(50.0, 300.0))
+    assert report.compare_to_baseline(results, baseline, tolerance=0.15) == [
+        {"workload": "read_page", "metric": "p95_ms", "baseline": 100.0, "current": 130.0},
+        {"workload": "search", "metric": "throughput_rps", "baseline": 400.0, "current": 300.0},
+    ]
+
+
+def test_one_workload_can_regress_on_both_metrics():
+    regressions = report.compare_to_baseline(
+        _run(approve=(300.0, 10.0)), _run(approve=(100.0, 50.0)), tolerance=0.1,
+    )
+    assert [r["metric"] for r in regressions] == ["p95_ms", "throughput_rps"]
+
+
+def test_faster_runs_are_not_flagged():
+    baseline = _run(read_page=(100.0, 200.0))
+    results = _run(read_page=(20.0, 900.0))
+    assert report.compare_to_baseline(results, baseline, tolerance=0.0) == []
+
+
+def test_workloads_missing_from_the_baseline_are_skipped():
+    baseline = _run(read_page=(100.0, 200.0))
+    results = _run(read_page=(100.0, 200.0), new_workload=(9999.0, 1.0))
+    assert report.compare_to_baseline(results, baseline, tolerance=0.15) == []
+    assert report.compare_to_baseline(results, {}, tolerance=0.15) == []
+
+
+def test_zero_baseline_values_are_ignored():
+    baseline = _run(read_page=(0.0, 0.0))
+    results = _run(read_page=(50.0, 10.0))
+    assert report.compare_to_baseline(results, baseline, tolerance=0.15) == []
@@ -0,0 +1,211 @@
+# tests/test_bulk_delete.py
+# Chunked bulk deletes recorded as one change with a single snapshot
+import contextlib
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Numeric, Table
+from sqlalchemy.sql.dml import Insert
+
+from app import cache, db_manager, models
+from app.config import settings
+
+products = Table(
+    "products", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("price", Numeric),
+)
+
+USER = SimpleNamespace(id=1, username="alice")
+# The tests below replace the run lock; keep the real one for its own test
+bulk_delete_lock = db_manager._bulk_delete_lock
+
+
+class FakeSession:
+    """An in-memory products table that understands the statements a bulk delete runs."""
+
+    def __init__(self, rows: dict, fail_on_delete: int = None):
+        self.rows = rows
+        self.fail_on_delete = fail_on_delete
+        self.deletes = 0
+        self.audit = []
+        self.changes = []
+        self.events = []
+
+    def get_env(self):
+        return "bulk_delete_test"
+
+    def get_engine(self):
+        return None
+
+    def add(self, change):
+        change.id = len(self.changes) + 1
+        self.changes.append(change)
+
+    def flush(self):
+        pass
+
+    def commit(self):
+        self.events.append(("commit", self.changes[-1].status))
+
+    def rollback(self):
+        self.events.append(("rollback", None))
+
+    def execute(self, statement, params=None):
+        if isinstance(statement, Insert):
+            self.audit.extend(params)
+            return None
+        sql = str(statement)
+        if sql.startswith("DELETE"):
+            self.deletes += 1
+            if self.deletes == self.fail_on_delete:
+                raise RuntimeError("lock timeout")
+            deleted = [self.rows.pop(pk) for pk in params["ids"] if pk in self.rows]
+            return [(row,) for row in deleted]
+        # Keyset page of the rows matching the filter (price > value_0)
+        matching = sorted(pk for pk, row in self.rows.items()
+                          if row["price"] > params["value_0"] and (params["after"] is None or pk > params["after"]))
+        return [(pk,) for pk in matching[:params["chunk_size"]]]
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    snapshots = []
+    monkeypatch.setattr(settings, "CACHE_INVALIDATION", False)
+    monkeypatch.setattr(db_manager, "_reflect_table", lambda engine, env, table_name: products)
+    monkeypatch.setattr(db_manager, "_bulk_delete_lock", lambda engine, change_id: contextlib.nullcontext())
+    monkeypatch.setattr(db_manager, "_create_table_snapshot", lambda db, table_name, change_id: snapshots.append(set(db.rows)))
+    return snapshots
+
+
+def _rows(count):
+    return {pk: {"id": pk, "price": pk * 10} for pk in range(1, count + 1)}
+
+
+def test_ids_are_deleted_in_chunks_and_approved_after_the_snapshot(isolated):
+    db = FakeSession(_rows(10))
+    version = cache.get_table_version("bulk_delete_test", "products")
+
+    result = db_manager.bulk_delete_records(db, "products", USER, ids=[1, 2, 3, 3, 4, 5, 99], chunk_size=2)
+
+    assert result == {"table": "products", "change_id": 1, "deleted": 5, "chunks": 3}
+    assert sorted(db.rows) == [6, 7, 8, 9, 10]
+    assert [entry["record_id"] for entry in db.audit] == ["1", "2", "3", "4", "5"]
+    # The snapshot is taken after every chunk was deleted
+    assert isolated == [{6, 7, 8, 9, 10}]
+    change = db.changes[0]
+    assert change.status == models.ChangeStatus.APPROVED
+    assert change.new_values == {"bulk_delete": {"ids": 7, "filters": [], "deleted": 5}}
+    # Recorded as RUNNING before the first chunk, one commit per chunk
+    assert db.events[0] == ("commit", models.ChangeStatus.RUNNING)
+    assert db.events.count(("commit", models.ChangeStatus.RUNNING)) == 4
+    assert cache.get_table_version("bulk_delete_test", "products") == version + 1
+
+
+def test_filters_are_deleted_page_by_page(isolated):
+    db = FakeSession(_rows(10))
+    filters = '[{"column": "price", "operator": ">", "value": 35}]'
+
+    result = db_manager.bulk_delete_records(db, "products", USER, filters_json=filters, chunk_size=4)
+
+    assert (result["deleted"], result["chunks"]) == (7, 2)
+    assert sorted(db.rows) == [1, 2, 3]
+    assert db.changes[0].new_values["bulk_delete"]["filters"] == [{"column": "price", "operator": ">"}]
+
+
+def test_failed_chunk_marks_the_change_failed_and_keeps_earlier_chunks(isolated):
+    db = FakeSession(_rows(10), fail_on_delete=2)
+
+    with pytest.raises(RuntimeError, match="lock timeout"):
+        db_manager.bulk_delete_records(db, "products", USER, ids=list(range(1, 7)), chunk_size=3)
+
+    assert sorted(db.rows) == [4, 5, 6, 7, 8, 9, 10]
+    assert isolated == []
+    change = db.changes[0]
+    assert change.status == models.ChangeStatus.FAILED
+    assert change.new_values["bulk_delete"]["deleted"] == 3
+    assert change.new_values["bulk_delete"]["error"] == "lock timeout"
+    assert ("rollback", None) in db.events and db.events[-1] == ("commit", models.ChangeStatus.FAILED)
+
+
+@pytest.mark.parametrize("kwargs,message", [
+    ({}, "Give either ids or filters"),
+    ({"ids": [1], "filters_json": "[]"}, "Give either ids or filters"),
+    ({"ids": []}, "ids must not be empty"),
+    ({"filters_json": '[{"column": "colour", "operator": "=", "value": 1}]'}, "no valid conditions"),
+    ({"filters_json": "not json"}, "no valid conditions"),
+])
+def test_invalid_requests_delete_nothing(kwargs, message):
+    db = FakeSession(_rows(3))
+    with pytest.raises(ValueError, match=message):
+        db_manager.bulk_delete_records(db, "products", USER, **kwargs)
+    assert db.changes == [] and len(db.rows) == 3
+
+
+@pytest.mark.parametrize("new_values,expected", [
+    ({"bulk_delete": {"deleted": 3}}, True),
+    ({"price": 12}, False),
+    ({}, False),
+    (None, False),
+])
+def test_is_bulk_delete(new_values, expected):
+    assert db_manager._is_bulk_delete(models.PendingChange(new_values=new_values)) is expected
+
+
+class FakeEngine:
+    """Records the statements run on its connections; UPDATE ... RETURNING yields `returned`."""
+
+    def __init__(self, returned=()):
+        self.returned = returned
+        self.statements = []
+
+    def connect(self):
+        return self
+
+    begin = connect
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, statement, params):
+        self.statements.append((" ".join(str(statement).split()), params))
+        return [(change_id,) for change_id in self.returned]
+
+    def commit(self):
+        pass
+
+
+def test_lock_is_released_when_the_run_fails():
+    engine = FakeEngine()
+    with pytest.raises(RuntimeError):
+        with bulk_delete_lock(engine, 12):
+            raise RuntimeError("chunk failed")
+    assert [sql for sql, _ in engine.statements] == [
+        "SELECT pg_advisory_lock(:class_key, :object_key)",
+        "SELECT pg_advisory_unlock(:class_key, :object_key)",
+    ]
+    assert engine.statements[0][1] == {"class_key": db_manager.BULK_DELETE_LOCK_CLASS, "object_key": 12}
+
+
+def test_startup_fails_runs_whose_lock_is_free():
+    engine = FakeEngine(returned=[4, 9])
+    version = cache.get_table_version("bulk_delete_test", "pending_changes")
+
+    assert db_manager.fail_interrupted_bulk_deletes(engine, "bulk_delete_test") == [4, 9]
+
+    sql, params = engine.statements[0]
+    assert "SET status = 'FAILED'" in sql
+    assert "c.status = 'RUNNING'" in sql and "pg_try_advisory_xact_lock(:class_key, c.id)" in sql
+    # The deleted count comes from the audit entries of the committed chunks
+    assert "SELECT count(*) FROM bulk_delete_test.audit_log a WHERE a.pending_change_id = c.id" in sql
+    assert params == {"key": "bulk_delete", "class_key": db_manager.BULK_DELETE_LOCK_CLASS}
+    assert cache.get_table_version("bulk_delete_test", "pending_changes") == version + 1
+
+
+def test_nothing_to_sweep():
+    version = cache.get_table_version("bulk_delete_test", "pending_changes")
+    assert db_manager.fail_interrupted_bulk_deletes(FakeEngine(), "bulk_delete_test") == []
+    assert cache.get_table_version("bulk_delete_test", "pending_changes") == version
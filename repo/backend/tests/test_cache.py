@@ -0,0 +1,150 @@
+# tests/test_cache.py
+# ResultCache eviction and expiry, and SingleFlight sharing of concurrent work
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app import cache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A manual monotonic clock for app.cache."""
+    now = [1000.0]
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_least_recently_used_entry_is_evicted():
+    results = cache.ResultCache(max_entries=2)
+    results.set(("dev", "a"), 1)
+    results.set(("dev", "b"), 2)
+    results.get(("dev", "a"))
+    results.set(("dev", "c"), 3)
+    assert results.get(("dev", "b")) is None
+    assert (results.get(("dev", "a")), results.get(("dev", "c"))) == (1, 3)
+
+
+def test_hits_and_misses_are_counted():
+    results = cache.ResultCache()
+    results.set(("dev", "a"), 1)
+    results.get(("dev", "a"))
+    results.get(("dev", "missing"), default="fallback")
+    assert (results.hits, results.misses) == (1, 1)
+
+
+def test_entries_expire_after_ttl(clock):
+    results = cache.ResultCache(ttl_seconds=5)
+    results.set(("dev", "a"), "page")
+    clock[0] += 4.9
+    assert results.get(("dev", "a")) == "page"
+    clock[0] += 0.1
+    assert results.get(("dev", "a")) is None
+    assert results._bytes == 0
+
+
+def test_setting_a_key_again_restarts_its_ttl(clock):
+    results = cache.ResultCache(ttl_seconds=5)
+    results.set(("dev", "a"), 1)
+    clock[0] += 4
+    results.set(("dev", "a"), 2)
+    clock[0] += 4
+    assert results.get(("dev", "a")) == 2
+
+
+def test_byte_bound_evicts_least_recently_used():
+    results = cache.ResultCache(max_bytes=10)
+    results.set(("dev", "a"), b"aaaa")
+    results.set(("dev", "b"), "bbbb")
+    results.get(("dev", "a"))
+    results.set(("dev", "c"), b"cccc")
+    assert results.get(("dev", "b")) is None
+    assert results._bytes == 8
+
+    # Replacing a value re-weighs it instead of counting both
+    results.set(("dev", "a"), b"a")
+    assert results._bytes == 5
+
+
+def test_values_larger_than_the_byte_bound_are_not_stored():
+    results = cache.ResultCache(max_bytes=10)
+    results.set(("dev", "small"), b"x" * 4)
+    results.set(("dev", "huge"), b"x" * 11)
+    assert results.get(("dev", "huge")) is None
+    assert results.get(("dev", "small")) == b"xxxx"
+
+
+def test_clear_can_be_limited_to_one_environment():
+    results = cache.ResultCache(max_bytes=100)
+    results.set(("dev", "a"), b"dev")
+    results.set(("test", "a"), b"test")
+    results.clear("dev")
+    assert results.get(("dev", "a")) is None
+    assert results.get(("test", "a")) == b"test"
+    assert results._bytes == 4
+    results.clear()
+    assert results.get(("test", "a")) is None and results._bytes == 0
+
+
+def _run_concurrently(flights, key, fn, callers):
+    outcomes = [None] * callers
+
+    def call(index):
+        try:
+            outcomes[index] = flights.do(key, fn)
+        except Exception as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def test_concurrent_callers_share_one_run():
+    flights = cache.SingleFlight()
+    release, calls = threading.Event(), []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return "rows"
+
+    threads, outcomes = _run_concurrently(flights, "key", work, callers=5)
+    # Give the followers time to join the running call before it finishes
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in outcomes) == [False, True, True, True, True]
+    assert {result for result, _ in outcomes} == {"rows"}
+    assert flights._flights == {}
+
+
+def test_exception_reaches_every_waiting_caller():
+    flights = cache.SingleFlight()
+    release = threading.Event()
+
+    def work():
+        release.wait(5)
+        raise RuntimeError("query failed")
+
+    threads, outcomes = _run_concurrently(flights, "key", work, callers=3)
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+    # A failed run is not remembered: the next call runs again
+    assert flights.do("key", lambda: "ok") == ("ok", False)
+
+
+def test_different_keys_do_not_share():
+    flights = cache.SingleFlight()
+    assert flights.do("a", lambda: 1) == (1, False)
+    assert flights.do("b", lambda: 2) == (2, False)
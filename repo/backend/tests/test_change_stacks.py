@@ -0,0 +1,46 @@
+# tests/test_change_stacks.py
+# Merging a stack of pending edits to one record into its net effect
+from types import SimpleNamespace
+
+import pytest
+
+from app import db_manager
+
+
+def _change(change_id, old_values, new_values, record_id=1):
+    return SimpleNamespace(id=change_id, record_id=record_id, old_values=old_values, new_values=new_values)
+
+
+def test_single_edit_is_unchanged():
+    stack = [_change(1, {"price": 10}, {"price": 12})]
+    assert db_manager._merge_stack(stack) == ({"price": 10}, {"price": 12})
+
+
+def test_later_values_win_and_old_values_come_from_the_first_edit():
+    stack = [
+        _change(1, {"price": 10}, {"price": 12}),
+        _change(2, {"price": 10, "name": "Lamp"}, {"price": 15, "name": "Desk lamp"}),
+        _change(3, {"stock_quantity": 4}, {"stock_quantity": 0}),
+    ]
+    old_values, new_values = db_manager._merge_stack(stack)
+    assert old_values == {"price": 10, "name": "Lamp", "stock_quantity": 4}
+    assert new_values == {"price": 15, "name": "Desk lamp", "stock_quantity": 0}
+
+
+def test_missing_old_values_are_tolerated():
+    stack = [_change(1, None, {"price": 12}), _change(2, {"price": 10}, {"price": 13})]
+    assert db_manager._merge_stack(stack) == ({"price": 10}, {"price": 13})
+
+
+def test_stack_ending_in_a_delete_writes_nothing():
+    stack = [_change(1, {"price": 10}, {"price": 12}), _change(2, {"price": 10, "name": "Lamp"}, {})]
+    old_values, new_values = db_manager._merge_stack(stack)
+    assert old_values == {"price": 10, "name": "Lamp"}
+    assert new_values == {}
+
+
+@pytest.mark.parametrize("deleted", [{}, None])
+def test_delete_followed_by_an_edit_is_rejected(deleted):
+    stack = [_change(1, {"price": 10}, deleted, record_id=7), _change(2, {"price": 10}, {"price": 12}, record_id=7)]
+    with pytest.raises(ValueError, match="Change 1 deletes record 7"):
+        db_manager._merge_stack(stack)
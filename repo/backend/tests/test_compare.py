@@ -0,0 +1,101 @@
+# tests/test_compare.py
+# diff_keys against in-memory table sides: range splitting, recursion and leaf comparison
+import hashlib
+
+import pytest
+
+from app import compare
+
+
+class FakeSide:
+    """A TableSide stand-in holding {pk: row} in memory and hashing ranges the same way."""
+
+    def __init__(self, rows: dict):
+        self.rows = rows
+        self.range_calls = []
+
+    def _hash(self, pk) -> str:
+        return hashlib.md5(repr(self.rows[pk]).encode()).hexdigest()
+
+    def key_bounds(self):
+        if not self.rows:
+            return None, None
+        return min(self.rows), max(self.rows)
+
+    def range_digests(self, ranges):
+        self.range_calls.append(list(ranges))
+        digests = {}
+        for index, (lo, hi, width) in enumerate(ranges):
+            for pk in self.rows:
+                if lo <= pk < hi:
+                    key = (index, (pk - lo) // width)
+                    count, digest = digests.get(key, (0, 0))
+                    digests[key] = (count + 1, digest + int(self._hash(pk)[:16], 16))
+        return digests
+
+    def leaf_hashes(self, ranges):
+        return {pk: self._hash(pk) for pk in self.rows if any(lo <= pk < hi for lo, hi in ranges)}
+
+
+def _rows(keys):
+    return {k: {"id": k, "name": f"row {k}"} for k in keys}
+
+
+def test_identical_sides_have_no_differences():
+    left, right = FakeSide(_rows(range(1, 5001))), FakeSide(_rows(range(1, 5001)))
+    result = compare.diff_keys(left, right, leaf_size=100, fanout=4)
+    assert (result["only_in_left"], result["only_in_right"], result["changed"]) == ([], [], [])
+    # Equal digests at the top level: nothing is split further or compared row by row
+    assert result["stats"]["levels"] == 1
+    assert result["stats"]["leaf_rows_compared"] == 0
+
+
+def test_finds_missing_extra_and_changed_keys():
+    left_rows = _rows(range(1, 5001))
+    right_rows = _rows(range(1, 5001))
+    del right_rows[17]
+    right_rows[6000] = {"id": 6000, "name": "new"}
+    right_rows[2500] = {"id": 2500, "name": "edited"}
+
+    result = compare.diff_keys(FakeSide(left_rows), FakeSide(right_rows), leaf_size=100, fanout=4)
+
+    assert result["only_in_left"] == [17]
+    assert result["only_in_right"] == [6000]
+    assert result["changed"] == [2500]
+
+
+def test_only_differing_ranges_are_split():
+    left_rows = _rows(range(0, 1600))
+    right_rows = dict(left_rows)
+    right_rows[5] = {"id": 5, "name": "edited"}
+    left, right = FakeSide(left_rows), FakeSide(right_rows)
+
+    result = compare.diff_keys(left, right, leaf_size=100, fanout=4)
+
+    assert result["changed"] == [5]
+    # 1600 keys split 4 ways per level: one range of width 400, then one of 100 (a leaf)
+    assert [len(ranges) for ranges in left.range_calls] == [1, 1]
+    assert left.range_calls[1] == [(0, 400, 100)]
+    # Only the single differing leaf is compared row by row
+    assert result["stats"]["leaf_rows_compared"] == 200
+
+
+def test_empty_sides():
+    result = compare.diff_keys(FakeSide({}), FakeSide({}))
+    assert result["only_in_left"] == [] and result["stats"]["levels"] == 0
+
+
+def test_one_empty_side_reports_every_key():
+    result = compare.diff_keys(FakeSide(_rows(range(10, 20))), FakeSide({}), leaf_size=4, fanout=2)
+    assert result["only_in_left"] == list(range(10, 20))
+    assert result["only_in_right"] == []
+
+
+@pytest.mark.parametrize("leaf_size,fanout", [(1, 2), (7, 3), (1000, 16)])
+def test_result_does_not_depend_on_split_parameters(leaf_size, fanout):
+    left_rows = _rows(range(1, 300))
+    right_rows = {**_rows(range(1, 300)), 150: {"id": 150, "name": "x"}}
+    del right_rows[299]
+    result = compare.diff_keys(FakeSide(left_rows), FakeSide(right_rows), leaf_size=leaf_size, fanout=fanout)
+    assert result["changed"] == [150]
+    assert result["only_in_left"] == [299]
@@ -0,0 +1,135 @@
+# tests/test_drivers.py
+# Driver selection and the COPY/pipeline helpers for psycopg2 and psycopg 3
+import io
+from types import SimpleNamespace
+
+import pytest
+
+from app import drivers
+from app.config import settings
+
+
+@pytest.fixture
+def driver(monkeypatch):
+    def use(name, prepare_threshold=5):
+        monkeypatch.setattr(settings, "DB_DRIVER", name)
+        monkeypatch.setattr(settings, "DB_PREPARE_THRESHOLD", prepare_threshold)
+    return use
+
+
+@pytest.mark.parametrize("name,drivername", [("psycopg2", "postgresql+psycopg2"), ("psycopg", "postgresql+psycopg")])
+def test_engine_url_uses_the_configured_driver(driver, name, drivername):
+    driver(name)
+    url = drivers.engine_url("postgresql://user:secret@db:5432/dev_db")
+    assert url.drivername == drivername
+    assert (url.host, url.database, url.password) == ("db", "dev_db", "secret")
+
+
+def test_engine_url_leaves_other_databases_alone(driver):
+    driver("psycopg")
+    assert drivers.engine_url("sqlite:///local.db").drivername == "sqlite"
+
+
+def test_unknown_driver_is_rejected(driver):
+    driver("asyncpg")
+    with pytest.raises(ValueError, match="DB_DRIVER must be one of"):
+        drivers.engine_url("postgresql://db/dev_db")
+
+
+@pytest.mark.parametrize("name,threshold,expected", [
+    ("psycopg2", 5, {"options": "-csearch_path=dev,public"}),
+    ("psycopg", 5, {"options": "-csearch_path=dev,public", "prepare_threshold": 5}),
+    ("psycopg", -1, {"options": "-csearch_path=dev,public", "prepare_threshold": None}),
+])
+def test_connect_args(driver, name, threshold, expected):
+    driver(name, threshold)
+    assert drivers.connect_args("dev") == expected
+
+
+class Psycopg2Cursor:
+    def __init__(self):
+        self.copied = []
+
+    def mogrify(self, statement, params):
+        return (statement % tuple(repr(p) for p in params)).encode()
+
+    def copy_expert(self, statement, stream, size=8192):
+        if "TO STDOUT" in statement:
+            stream.write("1\tLamp\n")
+        else:
+            self.copied.append((statement, stream.read()))
+
+
+class Psycopg3Copy:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __iter__(self):
+        return iter([b"1\tLamp\n", b"2\tDesk\n"])
+
+    def write(self, data):
+        self.cursor.blocks.append(data)
+
+
+class Psycopg3Cursor:
+    def __init__(self):
+        self.statements = []
+        self.blocks = []
+
+    def copy(self, statement, params=None):
+        self.statements.append((statement, params))
+        return Psycopg3Copy(self)
+
+
+def test_copy_to_with_psycopg2_inlines_the_parameters():
+    buffer = io.StringIO()
+    drivers.copy_to(Psycopg2Cursor(), "SELECT * FROM t WHERE id = ANY(%s)", ([1, 2],), buffer)
+    assert buffer.getvalue() == "1\tLamp\n"
+
+
+def test_copy_to_with_psycopg3_streams_every_block():
+    cursor, buffer = Psycopg3Cursor(), io.BytesIO()
+    drivers.copy_to(cursor, "SELECT * FROM t WHERE id = ANY(%s)", ([1, 2],), buffer)
+    assert cursor.statements == [("COPY (SELECT * FROM t WHERE id = ANY(%s)) TO STDOUT", ([1, 2],))]
+    assert buffer.getvalue() == b"1\tLamp\n2\tDesk\n"
+
+
+def test_copy_from_feeds_the_stream_in_blocks():
+    cursor = Psycopg3Cursor()
+    drivers.copy_from(cursor, "COPY t FROM STDIN", io.BytesIO(b"x" * 10), size=4)
+    assert cursor.blocks == [b"xxxx", b"xxxx", b"xx"]
+
+    cursor = Psycopg2Cursor()
+    drivers.copy_from(cursor, "COPY t FROM STDIN", io.StringIO("1\tLamp\n"))
+    assert cursor.copied == [("COPY t FROM STDIN", "1\tLamp\n")]
+
+
+def test_pipeline_is_a_no_op_with_psycopg2(driver):
+    driver("psycopg2")
+    db = SimpleNamespace(connection=lambda: pytest.fail("pipeline touched the connection"))
+    with drivers.pipeline(db):
+        pass
+
+
+def test_pipeline_wraps_the_block_with_psycopg3(driver):
+    driver("psycopg")
+    entered = []
+
+    class Pipeline:
+        def __enter__(self):
+            entered.append("enter")
+
+        def __exit__(self, *exc_info):
+            entered.append("exit")
+
+    driver_connection = SimpleNamespace(pipeline=Pipeline)
+    db = SimpleNamespace(connection=lambda: SimpleNamespace(connection=SimpleNamespace(driver_connection=driver_connection)))
+    with drivers.pipeline(db):
+        entered.append("block")
+    assert entered == ["enter", "block", "exit"]
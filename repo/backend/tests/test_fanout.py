@@ -0,0 +1,122 @@
+# tests/test_fanout.py
+# Running one read against every environment with a shared deadline
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app import db_manager, fanout
+
+
+class FakeSession:
+    def __init__(self, env):
+        self.env = env
+        self.closed = False
+        self.statement_timeout_ms = db_manager._statement_timeout_ms.get()
+
+    def close(self):
+        self.closed = True
+
+
+class QueryCanceled(Exception):
+    """Stands in for a DBAPIError wrapping Postgres' query_canceled."""
+
+    def __init__(self):
+        super().__init__("canceling statement due to statement timeout")
+        self.orig = SimpleNamespace(pgcode="57014")
+
+
+@pytest.fixture
+def environments(monkeypatch):
+    sessions = []
+
+    def open_read_session(env, target):
+        sessions.append(FakeSession(env))
+        return sessions[-1]
+
+    monkeypatch.setattr(db_manager, "DATABASE_URLS", {"dev": "postgresql://dev", "test": "postgresql://test", "prod": None})
+    monkeypatch.setattr(db_manager, "read_target", lambda env, request: "primary")
+    monkeypatch.setattr(db_manager, "open_read_session", open_read_session)
+    monkeypatch.setattr(db_manager, "get_all_table_names", lambda db: ["products"] if db.env == "dev" else ["products", "users"])
+    return sessions
+
+
+def test_every_configured_environment_is_read(environments):
+    result = fanout.fan_out(None, "products", lambda db: {"rows": [db.env]}, timeout=5)
+    assert result["complete"] is True
+    assert set(result["environments"]) == {"dev", "test"}
+    assert result["environments"]["dev"]["status"] == "ok"
+    assert result["environments"]["dev"]["rows"] == ["dev"]
+    assert result["environments"]["dev"]["served_by"] == "primary"
+    assert all(session.closed for session in environments)
+
+
+def test_each_read_runs_under_the_statement_timeout(environments):
+    fanout.fan_out(None, "products", lambda db: {}, timeout=2.5)
+    assert [session.statement_timeout_ms for session in environments] == [2500, 2500]
+    # The timeout does not leak out of the fan-out
+    assert db_manager._statement_timeout_ms.get() is None
+
+
+def test_missing_tables_and_failures_are_reported_per_environment(environments):
+    def read(db):
+        if db.env == "test":
+            raise ValueError("bad filter")
+        return {}
+
+    assert fanout.fan_out(None, "users", read, timeout=5)["environments"]["dev"]["status"] == "not_found"
+    invalid = fanout.fan_out(None, "products", read, timeout=5)["environments"]["test"]
+    assert (invalid["status"], invalid["detail"]) == ("invalid", "bad filter")
+
+
+def test_cancelled_statements_are_timeouts_other_errors_are_errors(environments):
+    def read(db):
+        raise QueryCanceled() if db.env == "dev" else RuntimeError("connection reset")
+
+    result = fanout.fan_out(None, "products", read, timeout=5)
+    assert result["environments"]["dev"]["status"] == "timeout"
+    assert result["environments"]["test"]["status"] == "error"
+    assert result["complete"] is False
+
+
+def test_reads_past_the_deadline_are_left_out(environments):
+    release = threading.Event()
+
+    def read(db):
+        if db.env == "test":
+            release.wait(5)
+        return {}
+
+    try:
+        result = fanout.fan_out(None, "products", read, timeout=0.2)
+    finally:
+        release.set()
+    assert result["environments"]["dev"]["status"] == "ok"
+    assert result["environments"]["test"] == {"status": "timeout", "detail": "No result within 0.2s"}
+    assert result["complete"] is False
+
+
+def test_timeout_is_clamped(environments):
+    assert fanout.fan_out(None, "products", lambda db: {}, timeout=10_000)["timeout_seconds"] == fanout.MAX_TIMEOUT_SECONDS
+    assert fanout.fan_out(None, "products", lambda db: {}, timeout=-1)["timeout_seconds"] == 0.0
+
+
+def test_checked_out_connections_get_set_local_inside_the_block():
+    executed = []
+    cursor = SimpleNamespace(execute=executed.append, close=lambda: None)
+    connection = SimpleNamespace(cursor=lambda: cursor)
+
+    db_manager._apply_statement_timeout(connection, None, None)
+    with db_manager.statement_timeout(0.0001):
+        db_manager._apply_statement_timeout(connection, None, None)
+    assert executed == ["SET LOCAL statement_timeout = 1"]
+
+
+@pytest.mark.parametrize("error,expected", [
+    (QueryCanceled(), True),
+    (SimpleNamespace(orig=SimpleNamespace(pgcode=None, sqlstate="57014")), True),
+    (SimpleNamespace(orig=SimpleNamespace(pgcode="40001")), False),
+    (RuntimeError("boom"), False),
+])
+def test_is_statement_timeout(error, expected):
+    assert db_manager.is_statement_timeout(error) is expected
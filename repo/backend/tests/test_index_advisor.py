@@ -0,0 +1,95 @@
+# tests/test_index_advisor.py
+# Filter usage tracking and the index recommendations built from it
+from types import SimpleNamespace
+
+import pytest
+
+from app import index_advisor
+
+
+def _row(**values):
+    return SimpleNamespace(_mapping=values, **values)
+
+
+class FakeEngine:
+    """Serves fixed pg_stat_user_tables / pg_stats rows."""
+
+    def __init__(self, table_stats: list[dict], column_stats: list[dict]):
+        self.table_stats = [_row(**r) for r in table_stats]
+        self.column_stats = [_row(**r) for r in column_stats]
+
+    def connect(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, statement, params):
+        return self.table_stats if "pg_stat_user_tables" in str(statement) else self.column_stats
+
+
+@pytest.fixture(autouse=True)
+def usage(monkeypatch):
+    monkeypatch.setattr(index_advisor, "_usage", {})
+
+
+def _recommend(monkeypatch, rows=50_000, n_distinct=-0.5, covered=None):
+    engine = FakeEngine(
+        [{"relname": "products", "n_live_tup": rows, "seq_scan": 40, "seq_tup_read": 0, "idx_scan": 0}],
+        [{"tablename": "products", "attname": column, "n_distinct": n_distinct, "null_frac": 0.0, "correlation": 0.1}
+         for column in ("name", "category", "price")],
+    )
+    monkeypatch.setattr(index_advisor, "_existing_index_coverage", lambda engine, env, table: covered or {})
+    db = SimpleNamespace(get_engine=lambda: engine, get_env=lambda: "dev")
+    return index_advisor.recommend_indexes(db)
+
+
+def test_usage_is_aggregated_per_column_and_operator():
+    index_advisor.record_filter_usage("dev", "products", [("price", ">"), ("name", "LIKE")], 10.0)
+    index_advisor.record_filter_usage("dev", "products", [("price", ">")], 30.0)
+    index_advisor.record_filter_usage("test", "products", [("price", ">")], 99.0)
+
+    usage = {(u["column"], u["operator"]): u for u in index_advisor.get_filter_usage("dev")}
+    assert set(usage) == {("price", ">"), ("name", "LIKE")}
+    assert (usage["price", ">"]["count"], usage["price", ">"]["avg_ms"], usage["price", ">"]["max_ms"]) == (2, 20.0, 30.0)
+
+
+@pytest.mark.parametrize("method,ddl", [
+    ("btree", 'CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_products_price" ON dev."products" ("price")'),
+    ("trgm", 'CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_products_price_trgm" ON dev."products" USING gin ("price" gin_trgm_ops)'),
+])
+def test_index_ddl(method, ddl):
+    assert index_advisor.index_ddl("dev", "products", "price", method) == ddl
+
+
+def test_no_usage_means_no_recommendations(monkeypatch):
+    assert _recommend(monkeypatch)["recommendations"] == []
+
+
+def test_like_filters_get_trigram_and_ranges_get_btree(monkeypatch):
+    index_advisor.record_filter_usage("dev", "products", [("name", "LIKE")], 5.0)
+    for _ in range(3):
+        index_advisor.record_filter_usage("dev", "products", [("price", ">")], 20.0)
+    index_advisor.record_filter_usage("dev", "products", [("category", "!=")], 50.0)
+
+    recommendations = _recommend(monkeypatch)["recommendations"]
+    # Most time spent first; "!=" alone never gets an index
+    assert [(r["column"], r["method"]) for r in recommendations] == [("price", "btree"), ("name", "trgm")]
+    assert recommendations[0]["score"] == 60.0
+
+
+def test_small_tables_and_covered_columns_are_skipped(monkeypatch):
+    index_advisor.record_filter_usage("dev", "products", [("price", ">"), ("name", "LIKE")], 20.0)
+    assert _recommend(monkeypatch, rows=index_advisor.MIN_TABLE_ROWS - 1)["recommendations"] == []
+    covered = {"price": {"btree"}, "name": {"trgm"}}
+    assert _recommend(monkeypatch, covered=covered)["recommendations"] == []
+
+
+@pytest.mark.parametrize("n_distinct,recommended", [(3, False), (1000, True), (-0.5, True)])
+def test_equality_filters_need_a_selective_column(monkeypatch, n_distinct, recommended):
+    index_advisor.record_filter_usage("dev", "products", [("category", "=")], 20.0)
+    recommendations = _recommend(monkeypatch, n_distinct=n_distinct)["recommendations"]
+    assert bool(recommendations) is recommended
@@ -0,0 +1,129 @@
+# tests/test_introspection.py
+# Building the schema catalog from bulk catalog rows and caching it by DDL fingerprint
+from types import SimpleNamespace
+
+import pytest
+
+from app import introspection
+
+COLUMNS = [
+    {"table_name": "orders", "relkind": "r", "name": "id", "type": "integer", "nullable": False, "default": None},
+    {"table_name": "orders", "relkind": "r", "name": "user_id", "type": "integer", "nullable": True, "default": None},
+    {"table_name": "users", "relkind": "r", "name": "id", "type": "integer", "nullable": False, "default": None},
+    {"table_name": "active_users", "relkind": "v", "name": "id", "type": "integer", "nullable": True, "default": None},
+]
+INDEXES = [
+    {"table_name": "orders", "name": "orders_pkey", "method": "btree", "is_unique": True, "is_primary": True,
+     "columns": ["id"], "definition": "CREATE UNIQUE INDEX orders_pkey ON dev.orders USING btree (id)"},
+    {"table_name": "orders", "name": "ix_orders_user_id", "method": "btree", "is_unique": False, "is_primary": False,
+     "columns": ["user_id"], "definition": "CREATE INDEX ix_orders_user_id ON dev.orders USING btree (user_id)"},
+    {"table_name": "gone", "name": "gone_pkey", "method": "btree", "is_unique": True, "is_primary": True,
+     "columns": ["id"], "definition": ""},
+]
+FOREIGN_KEYS = [
+    {"table_name": "orders", "name": "orders_user_id_fkey", "columns": ["user_id"],
+     "referred_schema": "dev", "referred_table": "users", "referred_columns": ["id"]},
+]
+
+
+class FakeEngine:
+    """Answers the catalog queries with fixed rows and records which ones ran."""
+
+    def __init__(self):
+        self.fingerprint = "f1"
+        self.row_estimates = {"orders": 120.0, "users": -1.0}
+        self.queries = []
+
+    def connect(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, statement, params):
+        sql = str(statement)
+        if sql == introspection._FINGERPRINT_SQL:
+            self.queries.append("fingerprint")
+            row = {"fingerprint": self.fingerprint, "row_estimates": self.row_estimates}
+            return SimpleNamespace(mappings=lambda: SimpleNamespace(one=lambda: row))
+        rows = {
+            introspection._COLUMNS_SQL: COLUMNS,
+            introspection._INDEXES_SQL: INDEXES,
+            introspection._FOREIGN_KEYS_SQL: FOREIGN_KEYS,
+        }[sql]
+        self.queries.append("catalog")
+        return SimpleNamespace(mappings=lambda: rows)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(introspection, "_catalogs", {})
+    engine = FakeEngine()
+    return SimpleNamespace(get_env=lambda: "dev", get_engine=lambda: engine, engine=engine)
+
+
+def test_catalog_combines_columns_keys_and_indexes(db):
+    catalog = introspection.get_schema_catalog(db)
+    tables = {t["name"]: t for t in catalog["tables"]}
+
+    assert [t["name"] for t in catalog["tables"]] == ["active_users", "orders", "users"]
+    assert tables["active_users"]["kind"] == "view"
+    orders = tables["orders"]
+    assert orders["primary_key"] == ["id"]
+    assert [(c["name"], c["primary_key"]) for c in orders["columns"]] == [("id", True), ("user_id", False)]
+    assert [i["name"] for i in orders["indexes"]] == ["orders_pkey", "ix_orders_user_id"]
+    assert orders["foreign_keys"][0]["referred_table"] == "users"
+
+
+def test_estimated_rows_are_unknown_for_never_analyzed_tables(db):
+    tables = {t["name"]: t for t in introspection.get_schema_catalog(db)["tables"]}
+    assert (tables["orders"]["estimated_rows"], tables["users"]["estimated_rows"]) == (120, None)
+    assert tables["active_users"]["estimated_rows"] is None
+
+
+def test_catalog_is_only_reread_when_the_fingerprint_changes(db):
+    introspection.get_schema_catalog(db)
+    introspection.get_schema_catalog(db)
+    assert db.engine.queries == ["fingerprint", "catalog", "catalog", "catalog", "fingerprint"]
+
+    db.engine.queries.clear()
+    db.engine.fingerprint = "f2"
+    introspection.get_schema_catalog(db)
+    assert db.engine.queries == ["fingerprint", "catalog", "catalog", "catalog"]
+
+
+def test_invalidate_forces_a_reread(db):
+    introspection.get_schema_catalog(db)
+    introspection.invalidate("dev")
+    db.engine.queries.clear()
+    introspection.get_schema_catalog(db)
+    assert db.engine.queries.count("catalog") == 3
+
+
+def test_table_columns(db):
+    assert [c["name"] for c in introspection.get_table_columns(db, "orders")] == ["id", "user_id"]
+    with pytest.raises(LookupError, match="Table 'missing' not found"):
+        introspection.get_table_columns(db, "missing")
+
+
+def test_schema_fingerprint_is_rechecked_after_a_short_interval(db, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(introspection, "_fingerprints", {})
+    monkeypatch.setattr(introspection, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    engine = db.engine
+
+    assert introspection.schema_fingerprint(engine, "dev") == "f1"
+    engine.fingerprint = "f2"
+    now[0] += introspection.FINGERPRINT_CHECK_SECONDS - 0.1
+    assert introspection.schema_fingerprint(engine, "dev") == "f1"
+    now[0] += 0.1
+    assert introspection.schema_fingerprint(engine, "dev") == "f2"
+    assert engine.queries == ["fingerprint", "fingerprint"]
+
+    # The app's own DDL is seen at once
+    engine.fingerprint = "f3"
+    introspection.invalidate("dev")
+    assert introspection.schema_fingerprint(engine, "dev") == "f3"
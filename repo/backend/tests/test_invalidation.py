@@ -0,0 +1,72 @@
+# tests/test_invalidation.py
+# Applying invalidation messages published by other worker processes
+import json
+
+import pytest
+
+from app import cache, db_manager, invalidation
+from app.config import settings
+
+
+def _payload(kind, origin="other-worker:1", **data):
+    return json.dumps({"origin": origin, "kind": kind, **data})
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    monkeypatch.setattr(invalidation, "_handlers", {})
+    received = []
+    invalidation.register_handler("ping", lambda env, message: received.append((env, message["n"])))
+    return received
+
+
+def test_messages_from_other_workers_reach_their_handlers(handlers):
+    invalidation._dispatch("dev", _payload("ping", n=1))
+    assert handlers == [("dev", 1)]
+
+
+@pytest.mark.parametrize("payload", [
+    _payload("ping", origin=invalidation.PROCESS_ID, n=1),
+    _payload("pong", n=1),
+    "not json",
+])
+def test_own_unknown_and_malformed_messages_are_ignored(handlers, payload):
+    invalidation._dispatch("dev", payload)
+    assert handlers == []
+
+
+def test_a_failing_handler_does_not_stop_the_others(handlers):
+    invalidation._handlers["ping"].insert(0, lambda env, message: 1 / 0)
+    invalidation._dispatch("dev", _payload("ping", n=2))
+    assert handlers == [("dev", 2)]
+
+
+def test_table_version_messages_invalidate_cached_results():
+    before = cache.get_table_version("invalidation_test", "products")
+    invalidation._dispatch("invalidation_test", _payload("table_version", table="products"))
+    assert cache.get_table_version("invalidation_test", "products") == before + 1
+
+
+def test_reset_clears_only_the_reconnected_environment():
+    results = cache.ResultCache()
+    results.set(("invalidation_dev", "a"), 1)
+    results.set(("invalidation_test", "a"), 2)
+    for handler in invalidation._reset_handlers:
+        handler("invalidation_dev")
+    assert results.get(("invalidation_dev", "a")) is None
+    assert results.get(("invalidation_test", "a")) == 2
+
+
+def test_publish_is_a_no_op_when_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_INVALIDATION", False)
+    monkeypatch.setattr(db_manager, "get_engine", lambda env: pytest.fail("publish touched the database"))
+    invalidation.publish("dev", "ping", n=1)
+
+
+def test_publish_failures_are_not_raised(monkeypatch):
+    def unreachable(env):
+        raise ConnectionError("database is down")
+
+    monkeypatch.setattr(settings, "CACHE_INVALIDATION", True)
+    monkeypatch.setattr(db_manager, "get_engine", unreachable)
+    invalidation.publish("dev", "ping", n=1)
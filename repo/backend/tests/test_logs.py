@@ -0,0 +1,65 @@
+# tests/test_logs.py
+# Redaction and the JSON line format of structured logs
+import json
+import logging
+
+from app import logs
+
+
+KEYS = frozenset({"password", "token", "new_values"})
+
+
+def test_redacts_keys_at_any_depth():
+    fields = {
+        "user": "alice",
+        "Password": "hunter2",
+        "change": {"id": 7, "new_values": {"price": 12}},
+        "attempts": [{"token": "abc", "ok": False}, ("x", {"TOKEN": "def"})],
+    }
+    assert logs._redact(fields, KEYS) == {
+        "user": "alice",
+        "Password": logs.REDACTED,
+        "change": {"id": 7, "new_values": logs.REDACTED},
+        "attempts": [{"token": logs.REDACTED, "ok": False}, ["x", {"TOKEN": logs.REDACTED}]],
+    }
+
+
+def test_redaction_leaves_the_input_untouched():
+    fields = {"password": "hunter2", "nested": {"token": "abc"}}
+    logs._redact(fields, KEYS)
+    assert fields == {"password": "hunter2", "nested": {"token": "abc"}}
+
+
+def test_scalars_pass_through():
+    assert logs._redact("password", KEYS) == "password"
+    assert logs._redact(None, KEYS) is None
+
+
+def _record(msg="change approved", level=logging.INFO, **attributes):
+    record = logging.LogRecord("app.db_manager", level, __file__, 1, msg, None, None)
+    record.__dict__.update(attributes)
+    return record
+
+
+def test_formatter_writes_one_redacted_json_object():
+    formatter = logs.JsonFormatter([" Password", "token", ""])
+    line = formatter.format(_record(request_id="req-1", fields={"change_id": 7, "password": "x"}))
+    entry = json.loads(line)
+    assert "\n" not in line
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "app.db_manager"
+    assert entry["msg"] == "change approved"
+    assert entry["request_id"] == "req-1"
+    assert (entry["change_id"], entry["password"]) == (7, logs.REDACTED)
+
+
+def test_context_filter_stamps_the_request_id_and_samples_debug():
+    context_filter = logs._ContextFilter(debug_sample_rate=0.0)
+    token = logs.request_id.set("req-2")
+    try:
+        record = _record()
+        assert context_filter.filter(record) and record.request_id == "req-2"
+        assert not context_filter.filter(_record(level=logging.DEBUG))
+        assert context_filter.filter(_record(level=logging.DEBUG, sample_rate=1.0))
+    finally:
+        logs.request_id.reset(token)
@@ -0,0 +1,70 @@
+# tests/test_metrics.py
+# Prometheus text rendering and SQL statement labelling
+import pytest
+
+from app import metrics
+
+
+def _lines(name: str) -> list[str]:
+    return [line for line in metrics.render().splitlines() if name in line]
+
+
+def test_counter_and_gauge_render_with_labels():
+    counter = metrics.Counter("test_requests_total", "Requests.", ("route",))
+    counter.inc("/a")
+    counter.inc("/a", amount=2)
+    gauge = metrics.Gauge("test_pool_size", "Pool size.", ("env",))
+    gauge.set("dev", value=3)
+    gauge.set("dev", value=5)
+
+    assert _lines("test_requests_total") == [
+        "# HELP test_requests_total Requests.",
+        "# TYPE test_requests_total counter",
+        'test_requests_total{route="/a"} 3.0',
+    ]
+    assert _lines("test_pool_size")[-1] == 'test_pool_size{env="dev"} 5'
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("test_latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe("/a", value=value)
+
+    assert _lines("test_latency_seconds")[2:] == [
+        'test_latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'test_latency_seconds_bucket{route="/a",le="1.0"} 3',
+        'test_latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'test_latency_seconds_sum{route="/a"} 4.05',
+        'test_latency_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_label_values_are_escaped():
+    counter = metrics.Counter("test_escaped_total", "Escaping.", ("value",))
+    counter.inc('a"b\\c\nd')
+    assert _lines("test_escaped_total")[-1] == 'test_escaped_total{value="a\\"b\\\\c\\nd"} 1.0'
+
+
+def test_wrong_label_count_is_rejected():
+    counter = metrics.Counter("test_labels_total", "Labels.", ("a", "b"))
+    with pytest.raises(ValueError):
+        counter.inc("only-one")
+
+
+def test_collectors_run_before_each_render():
+    gauge = metrics.Gauge("test_collected", "Collected.")
+    calls = []
+    metrics.register_collector(lambda: (calls.append(1), gauge.set(value=len(calls))))
+    metrics.render()
+    assert _lines("test_collected")[-1] == "test_collected 2"
+
+
+@pytest.mark.parametrize("statement,labels", [
+    ('SELECT * FROM dev."products" WHERE id = 1', ("products", "SELECT")),
+    ("  insert into dev.audit_log (id) values (1)", ("audit_log", "INSERT")),
+    ("UPDATE users SET role = 'admin'", ("users", "UPDATE")),
+    ("SELECT 1", ("none", "SELECT")),
+    ("", ("none", "UNKNOWN")),
+])
+def test_statement_labels(statement, labels):
+    assert metrics.statement_labels(statement) == labels
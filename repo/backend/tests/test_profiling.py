@@ -0,0 +1,51 @@
+# tests/test_profiling.py
+# Which slow statements may be re-run under EXPLAIN ANALYZE
+import pytest
+
+from app import profiling
+
+
+@pytest.mark.parametrize("statement", [
+    'SELECT * FROM dev.products WHERE price > 10',
+    "  select id from dev.users",
+])
+def test_plain_reads_are_explainable(statement):
+    assert profiling._explainable(statement, executemany=False)
+
+
+@pytest.mark.parametrize("statement", [
+    "SELECT pg_advisory_lock(1, 2)",
+    "SELECT pg_try_advisory_lock(1)",
+    "SELECT pg_advisory_xact_lock(7)",
+    "SELECT setval('dev.products_id_seq', 10)",
+    "SELECT nextval('dev.products_id_seq')",
+    "SELECT pg_notify('sagole_invalidate', '{}')",
+    "SELECT * FROM dev.products WHERE id = 1 FOR UPDATE",
+    "UPDATE dev.products SET price = 1",
+    "WITH gone AS (DELETE FROM dev.products RETURNING *) SELECT count(*) FROM gone",
+])
+def test_statements_with_side_effects_are_never_explained(statement):
+    assert not profiling._explainable(statement, executemany=False)
+
+
+def test_executemany_is_never_explained():
+    assert not profiling._explainable("SELECT 1", executemany=True)
+
+
+def test_plans_are_only_captured_inside_marked_helpers():
+    @profiling.capture_plans
+    def read():
+        return profiling._capture_plans.get()
+
+    assert profiling._capture_plans.get() is False
+    assert read() is True
+    # The flag is reset afterwards, also when the helper raises
+    assert profiling._capture_plans.get() is False
+
+    @profiling.capture_plans
+    def failing_read():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        failing_read()
+    assert profiling._capture_plans.get() is False
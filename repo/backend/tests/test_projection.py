@@ -0,0 +1,76 @@
+# tests/test_projection.py
+# Column projection, the choice of cells worth truncating, and the reflected-table cache behind them
+import pytest
+from sqlalchemy import JSON, Column, Integer, MetaData, String, Table, Text
+
+from app import db_manager, introspection
+
+products = Table(
+    "products", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("sku", String(20)),
+    Column("name", String(255)),
+    Column("notes", String),
+    Column("description", Text),
+    Column("attributes", JSON),
+)
+
+
+def test_no_columns_means_all_columns_in_table_order():
+    assert db_manager._resolve_projection(products, None) == ["id", "sku", "name", "notes", "description", "attributes"]
+    assert db_manager._resolve_projection(products, []) == db_manager._resolve_projection(products, None)
+
+
+def test_requested_order_is_kept_and_duplicates_dropped():
+    assert db_manager._resolve_projection(products, ["name", "id", "name"]) == ["name", "id"]
+
+
+def test_unknown_columns_are_rejected():
+    with pytest.raises(ValueError, match="Unknown columns for table 'products': colour, size"):
+        db_manager._resolve_projection(products, ["id", "colour", "size"])
+
+
+@pytest.mark.parametrize("column,truncate_at,wide", [
+    ("id", 10, False),
+    ("sku", 100, False),
+    ("sku", 10, True),
+    ("name", 100, True),
+    ("notes", 100_000, True),
+    ("description", 100_000, True),
+    ("attributes", 100, True),
+])
+def test_wide_columns(column, truncate_at, wide):
+    assert db_manager._is_wide_column(products.c[column], truncate_at) is wide
+
+
+@pytest.fixture
+def schema(monkeypatch):
+    """Fakes the DDL fingerprint and counts reflections."""
+    state = {"fingerprint": "f1", "reflected": []}
+    monkeypatch.setattr(db_manager, "_reflected_tables", {})
+    monkeypatch.setattr(introspection, "schema_fingerprint", lambda engine, env: state["fingerprint"])
+
+    def reflect(table_name, metadata, autoload_with, schema):
+        state["reflected"].append((schema, table_name, state["fingerprint"]))
+        return (schema, table_name, state["fingerprint"])
+
+    monkeypatch.setattr(db_manager, "Table", reflect)
+    return state
+
+
+def test_reflected_tables_are_reused_while_the_schema_is_unchanged(schema):
+    first = db_manager._reflect_table(None, "dev", "products")
+    assert db_manager._reflect_table(None, "dev", "products") is first
+    assert len(schema["reflected"]) == 1
+
+
+def test_ddl_outside_the_app_causes_a_fresh_reflection(schema):
+    db_manager._reflect_table(None, "dev", "products")
+    db_manager._reflect_table(None, "dev", "users")
+    db_manager._reflect_table(None, "test", "products")
+
+    schema["fingerprint"] = "f2"
+    assert db_manager._reflect_table(None, "dev", "products") == ("dev", "products", "f2")
+    # Everything the environment reflected under the old fingerprint is dropped, not just
+    # the table asked for; other environments have their own fingerprint
+    assert set(db_manager._reflected_tables) == {("dev", "products"), ("test", "products")}
@@ -0,0 +1,66 @@
+# tests/test_promotion.py
+# Recording a promotion request as one pending change on the target environment
+from types import SimpleNamespace
+
+import pytest
+
+from app import compare, models, promotion, schemas
+
+
+class FakeSession:
+    def __init__(self, env: str):
+        self.env = env
+        self.added = []
+
+    def get_env(self):
+        return self.env
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    def commit(self):
+        pass
+
+    def refresh(self, obj):
+        pass
+
+
+@pytest.fixture
+def delta(monkeypatch):
+    monkeypatch.setattr(compare, "_prepare_sides", lambda source_env, target_env, table_name: (None, None))
+    monkeypatch.setattr(compare, "diff_keys", lambda source, target: {
+        "only_in_left": [1, 2, 3], "only_in_right": [9], "changed": [5, 6],
+    })
+
+
+@pytest.mark.parametrize("delete_missing,deletes", [(False, 0), (True, 1)])
+def test_promotion_is_recorded_with_its_summary(delta, delete_missing, deletes):
+    db = FakeSession("prod")
+    request = schemas.PromotionRequest(table_name="products", source_env="test", delete_missing=delete_missing)
+
+    change = promotion.create_promotion_request(db, request, SimpleNamespace(username="alice"))
+
+    assert db.added == [change]
+    assert (change.table_name, change.record_id, change.submitted_by) == ("products", None, "alice")
+    assert change.new_values[promotion.PROMOTION_KEY] == {
+        "source_env": "test",
+        "delete_missing": delete_missing,
+        "summary": {"insert": 3, "update": 2, "delete": deletes},
+    }
+    assert promotion.is_promotion(change)
+
+
+def test_promoting_into_the_same_environment_is_rejected(delta):
+    request = schemas.PromotionRequest(table_name="products", source_env="dev")
+    with pytest.raises(ValueError, match="must differ"):
+        promotion.create_promotion_request(FakeSession("dev"), request, SimpleNamespace(username="alice"))
+
+
+@pytest.mark.parametrize("new_values,expected", [
+    ({promotion.PROMOTION_KEY: {}}, True),
+    ({"price": 12}, False),
+    ({}, False),
+    (None, False),
+])
+def test_is_promotion(new_values, expected):
+    assert promotion.is_promotion(models.PendingChange(new_values=new_values)) is expected
@@ -0,0 +1,105 @@
+# tests/test_read_routing.py
+# Choosing between an environment's primary and its read replica
+from types import SimpleNamespace
+
+import pytest
+
+from app import db_manager
+from app.config import settings
+
+
+class FakeReplica:
+    """Reports a fixed replication lag, or fails if `lag` is an exception."""
+
+    def __init__(self, lag):
+        self.lag = lag
+        self.checks = 0
+
+    def connect(self):
+        self.checks += 1
+        if isinstance(self.lag, Exception):
+            raise self.lag
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, statement):
+        return SimpleNamespace(scalar=lambda: self.lag)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(db_manager, "time", SimpleNamespace(monotonic=lambda: now[0], perf_counter=lambda: now[0]))
+    monkeypatch.setattr(db_manager, "REPLICA_DATABASE_URLS", {"dev": "postgresql://replica/dev_db"})
+    monkeypatch.setattr(db_manager, "_pinned_clients", {})
+    monkeypatch.setattr(db_manager, "_replica_lag", {})
+    monkeypatch.setattr(settings, "CACHE_INVALIDATION", False)
+    monkeypatch.setattr(settings, "READ_YOUR_WRITES_SECONDS", 5)
+    monkeypatch.setattr(settings, "REPLICA_MAX_LAG_SECONDS", 10.0)
+    monkeypatch.setattr(settings, "REPLICA_LAG_CHECK_INTERVAL_SECONDS", 2.0)
+    return now
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    engine = FakeReplica(lag=0.5)
+    monkeypatch.setattr(db_manager, "get_replica_engine", lambda env: engine)
+    return engine
+
+
+def _request(token=None, host="10.0.0.1"):
+    headers = {"authorization": f"Bearer {token}"} if token else {}
+    return SimpleNamespace(headers=headers, client=SimpleNamespace(host=host))
+
+
+def test_environments_without_a_replica_read_from_the_primary(clock, replica):
+    assert db_manager.read_target("test", _request("alice")) == "primary"
+    assert replica.checks == 0
+
+
+def test_caught_up_replica_serves_reads(clock, replica):
+    assert db_manager.read_target("dev", _request("alice")) == "replica"
+
+
+@pytest.mark.parametrize("lag", [10.5, RuntimeError("replica down")])
+def test_lagging_or_unreachable_replica_falls_back_to_the_primary(clock, replica, lag):
+    replica.lag = lag
+    assert db_manager.read_target("dev", _request("alice")) == "primary"
+
+
+def test_lag_is_measured_at_most_once_per_interval(clock, replica):
+    assert db_manager.get_replica_lag("dev") == 0.5
+    replica.lag = 30.0
+    clock[0] += 1.9
+    assert db_manager.get_replica_lag("dev") == 0.5
+    clock[0] += 0.1
+    assert db_manager.get_replica_lag("dev") == 30.0
+    assert replica.checks == 2
+
+
+def test_a_client_that_wrote_reads_its_writes_from_the_primary(clock, replica):
+    db_manager.pin_client_to_primary("dev", _request("alice"))
+    assert db_manager.read_target("dev", _request("alice")) == "primary"
+    # Other clients keep using the replica
+    assert db_manager.read_target("dev", _request("bob")) == "replica"
+
+    clock[0] += settings.READ_YOUR_WRITES_SECONDS + 0.1
+    assert db_manager.read_target("dev", _request("alice")) == "replica"
+
+
+def test_clients_without_a_token_are_told_apart_by_address(clock, replica):
+    db_manager.pin_client_to_primary("dev", _request(host="10.0.0.1"))
+    assert db_manager.read_target("dev", _request(host="10.0.0.1")) == "primary"
+    assert db_manager.read_target("dev", _request(host="10.0.0.2")) == "replica"
+
+
+def test_expired_pins_are_dropped(clock, replica):
+    db_manager.pin_client_to_primary("dev", _request("alice"))
+    clock[0] += 60
+    db_manager.pin_client_to_primary("dev", _request("bob"))
+    assert len(db_manager._pinned_clients) == 1
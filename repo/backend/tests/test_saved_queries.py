@@ -0,0 +1,148 @@
+# tests/test_saved_queries.py
+# Compiling saved query definitions and caching their results per table version
+import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Numeric, String, Table
+
+from app import cache, db_manager, saved_queries
+from app.config import settings
+
+products = Table(
+    "products", MetaData(schema="dev"),
+    Column("id", Integer, primary_key=True),
+    Column("name", String),
+    Column("category", String),
+    Column("price", Numeric),
+)
+
+
+def _compile(definition, parameters=None):
+    return saved_queries.compile_query(products, definition, parameters or {})
+
+
+def test_projection_with_static_and_runtime_filters():
+    compiled = _compile(
+        {"columns": ["name", "price"], "filters": [
+            {"column": "category", "operator": "=", "value": ":category"},
+            {"column": "price", "operator": ">", "value": 10},
+        ], "limit": 50},
+        {"category": None},
+    )
+    assert str(compiled.statement) == (
+        'SELECT "name", "price" FROM dev."products" WHERE "category" = :value_0 AND "price" > :value_1 '
+        'ORDER BY "id" LIMIT :limit'
+    )
+    assert compiled.bind({"category": "lamps"}) == {"value_1": 10, "limit": 50, "value_0": "lamps"}
+
+
+def test_aggregate_query_groups_and_orders_by_the_group_columns():
+    compiled = _compile({"group_by": ["category"], "aggregates": ["count:*", "avg:price"]})
+    assert str(compiled.statement) == (
+        'SELECT "category", count(*) AS "count", avg("price") AS "avg_price" FROM dev."products" '
+        'GROUP BY "category" ORDER BY "category" LIMIT :limit'
+    )
+
+
+@pytest.mark.parametrize("definition,parameters,message", [
+    ({"limit": 0}, {}, "limit must be between"),
+    ({"limit": saved_queries.MAX_ROWS + 1}, {}, "limit must be between"),
+    ({"filters": [{"column": "colour", "operator": "=", "value": 1}]}, {}, "Every filter needs"),
+    ({"filters": [{"column": "price", "operator": "~", "value": 1}]}, {}, "Every filter needs"),
+    ({"filters": [{"column": "name", "operator": "=", "value": ":name"}]}, {}, "undeclared parameter 'name'"),
+    ({"columns": ["name"], "group_by": ["category"]}, {}, "either projects columns or aggregates"),
+    ({"aggregates": ["sum:name"]}, {}, "needs a numeric column"),
+    ({"columns": ["colour"]}, {}, "Unknown columns"),
+])
+def test_invalid_definitions_are_rejected(definition, parameters, message):
+    with pytest.raises(ValueError, match=message):
+        _compile(definition, parameters)
+
+
+@pytest.mark.parametrize("value,name", [(":category", "category"), (":", None), ("plain", None), (5, None)])
+def test_placeholder(value, name):
+    assert saved_queries._placeholder(value) == name
+
+
+class FakeEngine:
+    def __init__(self):
+        self.runs = []
+
+    def connect(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, statement, params):
+        self.runs.append(params)
+        return SimpleNamespace(mappings=lambda: [{"name": "Lamp", "price": 12}])
+
+
+@pytest.fixture
+def saved(monkeypatch):
+    query = SimpleNamespace(
+        id=1, name="by category", table_name="products", updated_at=datetime.datetime(2026, 1, 1),
+        definition={"columns": ["name", "price"], "filters": [{"column": "category", "operator": "=", "value": ":category"}]},
+        parameters={"category": None},
+    )
+    engine = FakeEngine()
+    monkeypatch.setattr(saved_queries, "_compiled", cache.ResultCache(max_entries=2))
+    monkeypatch.setattr(saved_queries, "_results", cache.ResultCache(ttl_seconds=settings.TABLE_READ_CACHE_TTL_SECONDS))
+    monkeypatch.setattr(saved_queries, "_get_saved_query", lambda db, query_id: query)
+    monkeypatch.setattr(db_manager, "_reflect_table", lambda engine, env, table_name: products)
+    db = SimpleNamespace(get_env=lambda: "saved_queries_test", get_engine=lambda: engine)
+    return db, engine
+
+
+def test_repeated_runs_are_served_from_the_cache_until_the_table_changes(saved):
+    db, engine = saved
+    first = saved_queries.run_saved_query(db, 1, {"category": "lamps"})
+    second = saved_queries.run_saved_query(db, 1, {"category": "lamps"})
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert second["rows"] == first["rows"] == [{"name": "Lamp", "price": 12}]
+    assert len(engine.runs) == 1
+
+    # Other parameter values are cached separately
+    saved_queries.run_saved_query(db, 1, {"category": "desks"})
+    assert len(engine.runs) == 2
+
+    cache.bump_table_version("saved_queries_test", "products", broadcast=False)
+    assert saved_queries.run_saved_query(db, 1, {"category": "lamps"})["cached"] is False
+    assert len(engine.runs) == 3
+    assert engine.runs[-1]["value_0"] == "lamps"
+
+
+@pytest.mark.parametrize("parameters,message", [
+    ({}, "Missing required parameters: category"),
+    ({"category": "lamps", "colour": "red"}, "Unknown parameters: colour"),
+])
+def test_parameters_are_checked_before_running(saved, parameters, message):
+    db, engine = saved
+    with pytest.raises(ValueError, match=message):
+        saved_queries.run_saved_query(db, 1, parameters)
+    assert engine.runs == []
+
+
+def test_cached_results_expire(saved, monkeypatch):
+    db, engine = saved
+    now = [1000.0]
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    saved_queries.run_saved_query(db, 1, {"category": "lamps"})
+    now[0] += settings.TABLE_READ_CACHE_TTL_SECONDS
+    assert saved_queries.run_saved_query(db, 1, {"category": "lamps"})["cached"] is False
+    assert len(engine.runs) == 2
+
+
+def test_compiled_versions_of_edited_queries_are_evicted(saved):
+    db, engine = saved
+    query = saved_queries._get_saved_query(db, 1)
+    for day in range(1, 6):
+        query.updated_at = datetime.datetime(2026, 1, day)
+        saved_queries.run_saved_query(db, 1, {"category": "lamps"})
+    assert len(saved_queries._compiled._entries) == 2
+    assert ("saved_queries_test", 1, datetime.datetime(2026, 1, 5)) in saved_queries._compiled._entries
@@ -0,0 +1,92 @@
+# tests/test_search.py
+# Searchable columns, configured index columns and the cached trigram index state
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, Text
+
+from app import search
+from app.config import settings
+
+
+class FakeEngine:
+    """Answers the index state query with a fixed row and counts how often it was asked."""
+
+    def __init__(self, trgm: bool, columns: list[str]):
+        self.row = SimpleNamespace(trgm=trgm, columns=columns)
+        self.queries = 0
+
+    def connect(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, statement, params):
+        self.queries += 1
+        return SimpleNamespace(one=lambda: self.row)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(search, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    monkeypatch.setattr(search, "_index_state", {})
+    return now
+
+
+def test_text_columns_exclude_password_hashes_and_non_text():
+    users = Table(
+        "users", MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("username", String(50)),
+        Column("bio", Text),
+        Column("password_hash", String),
+    )
+    assert search.text_columns(users) == ["username", "bio"]
+
+
+@pytest.mark.parametrize("setting,expected", [
+    ("products.name,products.description", {"products": ["name", "description"]}),
+    (" products.name , users.username ", {"products": ["name"], "users": ["username"]}),
+    ("products,.name,,", {}),
+    ("", {}),
+])
+def test_configured_columns(monkeypatch, setting, expected):
+    monkeypatch.setattr(settings, "SEARCH_INDEX_COLUMNS", setting)
+    assert search.configured_columns() == expected
+
+
+@pytest.mark.parametrize("value,escaped", [
+    ("lamp", "lamp"),
+    ("50%", "50\\%"),
+    ("user_1", "user\\_1"),
+    ("C:\\temp", "C:\\\\temp"),
+])
+def test_escape_like(value, escaped):
+    assert search._escape_like(value) == escaped
+
+
+def test_index_state_is_reused_until_it_expires(clock):
+    engine = FakeEngine(trgm=True, columns=["name"])
+    assert search._index_status(engine, "dev", "products") == (True, {"name"})
+
+    engine.row = SimpleNamespace(trgm=True, columns=["name", "description"])
+    clock[0] += search.INDEX_STATE_TTL_SECONDS - 1
+    assert search._index_status(engine, "dev", "products") == (True, {"name"})
+    assert engine.queries == 1
+
+    clock[0] += 1
+    assert search._index_status(engine, "dev", "products") == (True, {"name", "description"})
+    assert engine.queries == 2
+
+
+def test_index_state_is_kept_per_environment_and_table(clock):
+    engine = FakeEngine(trgm=False, columns=[])
+    search._index_status(engine, "dev", "products")
+    search._index_status(engine, "test", "products")
+    search._index_status(engine, "dev", "users")
+    assert engine.queries == 3
@@ -0,0 +1,34 @@
+# tests/test_seeding.py
+# Recovering the row index from previously generated sequence values
+import re
+
+import pytest
+
+from app import seeding
+
+
+@pytest.mark.parametrize("fmt,value,index", [
+    ("{i}", "42", "42"),
+    ("user_{i}", "user_17", "17"),
+    ("user_{i}@example.com", "user_3@example.com", "3"),
+    ("SKU-{i:06d}", "SKU-000120", "000120"),
+    ("a.b+{i}(x)", "a.b+9(x)", "9"),
+])
+def test_pattern_captures_the_index(fmt, value, index):
+    match = re.match(seeding._sequence_pattern(fmt), value)
+    assert match and match.group(1) == index
+
+
+@pytest.mark.parametrize("fmt,value", [
+    ("user_{i}", "admin"),
+    ("user_{i}", "user_17x"),
+    ("user_{i}", "xuser_17"),
+    ("a.b{i}", "axb1"),
+])
+def test_pattern_ignores_hand_written_values(fmt, value):
+    assert re.match(seeding._sequence_pattern(fmt), value) is None
+
+
+@pytest.mark.parametrize("fmt", ["static", "{i}-{i}", "{n}", "{0}"])
+def test_formats_without_a_single_index_have_no_pattern(fmt):
+    assert seeding._sequence_pattern(fmt) is None